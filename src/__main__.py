@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 
 import asyncio
+import sys
 import logging.config
 from pathlib import Path
 import csv
-import json
+import heapq
+import html
+import itertools
+import random
+import tempfile
+import time
 import aiohttp
+import orjson
 
 from symphony.bdk.core.config.loader import BdkConfigLoader
 from symphony.bdk.core.symphony_bdk import SymphonyBdk
@@ -15,201 +22,565 @@ from symphony.bdk.core.activity.form import FormReplyActivity, FormReplyContext
 # Configure logging
 logging_conf = Path(__file__).parent.parent / "resources" / "logging.conf"
 logging.config.fileConfig(logging_conf, disable_existing_loggers=False)
+log = logging.getLogger(__name__)
 
 # Global client data storage
-CLIENTS = []
-FAVOURITES = []
+# Clients are stored column-wise: parallel lists indexed by client position
+CLIENT_IDS = []
+CLIENT_NAMES = []
+CLIENT_FAV = []
+CLIENT_BY_ID = {}  # client_id -> index
+CLIENT_IDS_ML = []  # IDs and names HTML-escaped once for MessageML
+CLIENT_NAMES_ML = []
+FAVOURITES = []  # indices of the top 10 favourite clients
+
+# Search index, rebuilt on every CSV load: one lowercase "name\nid" key per
+# client (parallel to CLIENT_IDS) and an n-gram (1-3 chars) -> client-index
+# posting map
+_SEARCH_KEYS = []
+_NGRAM_INDEX = {}
+_EMPTY_POSTINGS = frozenset()
+
+# Search result button per client (parallel to CLIENT_IDS), favourites bar and
+# /help HTML, all rendered once per CSV load
+_CLIENT_BUTTONS_HTML = []
+_FAVOURITES_HTML = ""
+_HELP_TEXT = ""
 
 # Trades API configuration
 TRADES_API_BASE_URL = "http://127.0.0.1:8001"
 
+# Retry policy for transient API failures (full-jitter exponential backoff)
+API_MAX_ATTEMPTS = 3
+API_BACKOFF_BASE = 0.1
+API_BACKOFF_MAX = 2.0
+
+# Bulkhead: max concurrent trades API calls, and how long a call may queue for a slot
+TRADES_MAX_CONCURRENCY = 8
+TRADES_QUEUE_TIMEOUT = 0.5
+
+# How long (seconds) API results are served from cache before re-fetching
+STATUS_CACHE_TTL = 10
+CREDIT_CACHE_TTL = 30
+TRADES_CACHE_TTL = 15
+HEALTH_CACHE_TTL = 10
+
+# HTTP timeouts (seconds); loopback connects are near-instant, reads may vary.
+# API_TIMEOUT is the shared session's default.
+API_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=2, sock_read=8)
+DOCUMENT_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=2, sock_read=25)
+HEALTH_CHECK_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+
+# Read size when streaming trade documents from the API
+DOCUMENT_CHUNK_SIZE = 64 * 1024
+
+# Shared HTTP session for all API calls, so connections are pooled (see get_session)
+_HTTP_SESSION = None
+
+async def get_session():
+    """Return the shared HTTP session, creating it on first use."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None or _HTTP_SESSION.closed:
+        _HTTP_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            ),
+            timeout=API_TIMEOUT
+        )
+    return _HTTP_SESSION
+
+async def close_session():
+    """Close the shared HTTP session, if one was opened."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is not None:
+        await _HTTP_SESSION.close()
+        _HTTP_SESSION = None
+
 def load_clients_from_csv(csv_path="clients.csv"):
     """Load clients from CSV file."""
-    global CLIENTS, FAVOURITES
+    global CLIENT_IDS, CLIENT_NAMES, CLIENT_FAV, CLIENT_BY_ID, CLIENT_IDS_ML, CLIENT_NAMES_ML, FAVOURITES
     
     try:
         csv_file_path = Path(__file__).parent.parent / csv_path
         
-        with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            CLIENTS = []
-            FAVOURITES = []
+        with open(csv_file_path, 'r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.reader(csvfile)
+            header = [name.strip() for name in next(reader)]
+            id_col = header.index('client_id')
+            name_col = header.index('client_name')
+            fav_col = header.index('is_favourite')
             
+            # Stream rows straight into the column lists, never holding the whole file
+            client_ids = []
+            client_names = []
+            favourite_flags = []
             for row in reader:
-                client = {
-                    'client_id': row['client_id'].strip(),
-                    'client_name': row['client_name'].strip(),
-                    'is_favourite': row['is_favourite'].strip().lower() == 'true'
-                }
-                CLIENTS.append(client)
-                
-                if client['is_favourite']:
-                    FAVOURITES.append(client)
-            
-            # Sort favourites by name and limit to 10
-            FAVOURITES.sort(key=lambda x: x['client_name'])
-            FAVOURITES = FAVOURITES[:10]
-            
-            print(f"Loaded {len(CLIENTS)} clients, {len(FAVOURITES)} favourites")
-            return True
-            
+                if not row:
+                    continue  # skip blank lines, as DictReader did
+                client_ids.append(row[id_col].strip())
+                client_names.append(row[name_col].strip())
+                favourite_flags.append(row[fav_col].strip().lower() == 'true')
+        
+        CLIENT_IDS = client_ids
+        CLIENT_NAMES = client_names
+        CLIENT_FAV = favourite_flags
+        CLIENT_IDS_ML = [html.escape(client_id) for client_id in client_ids]
+        CLIENT_NAMES_ML = [html.escape(name) for name in client_names]
+        # Map each ID to its first occurrence, matching what a top-down scan would find
+        CLIENT_BY_ID = {}
+        for i, client_id in enumerate(client_ids):
+            CLIENT_BY_ID.setdefault(client_id, i)
+        
+        # Select favourites by mask and keep the first 10 by name (partial sort)
+        FAVOURITES = heapq.nsmallest(
+            10,
+            (i for i, is_favourite in enumerate(favourite_flags) if is_favourite),
+            key=client_names.__getitem__
+        )
+        
+        log.info("Loaded %d clients, %d favourites", len(CLIENT_IDS), len(FAVOURITES))
+        return True
+        
     except FileNotFoundError:
-        print(f"CSV file not found: {csv_path}")
+        log.error("CSV file not found: %s", csv_path)
         return False
         
     except Exception as e:
-        print(f"Error loading CSV: {e}")
+        log.error("Error loading CSV: %s", e)
+        return False
+    
+    finally:
+        _build_search_index()
+        _rebuild_client_buttons_html()
+        _rebuild_favourites_html()
+        _rebuild_help_text()
+
+def _rebuild_client_buttons_html():
+    """Re-render every client's search result button; client data only changes on CSV load."""
+    global _CLIENT_BUTTONS_HTML
+    _CLIENT_BUTTONS_HTML = [
+        _CLIENT_BUTTON_TEMPLATE.format(
+            favourite_star="⭐ " if is_favourite else "",
+            client_id=client_id,
+            client_name=client_name
+        )
+        for client_id, client_name, is_favourite in zip(CLIENT_IDS_ML, CLIENT_NAMES_ML, CLIENT_FAV)
+    ]
+
+def _rebuild_favourites_html():
+    """Re-render the cached favourites bar; FAVOURITES only changes on CSV load."""
+    global _FAVOURITES_HTML
+    _FAVOURITES_HTML = _render_favourites_bar()
+
+def _rebuild_help_text():
+    """Re-render the cached /help message with the current client counts."""
+    global _HELP_TEXT
+    _HELP_TEXT = _HELP_TEMPLATE.format(
+        clients=len(CLIENT_IDS),
+        favourites=len(FAVOURITES),
+        api_url=TRADES_API_BASE_URL
+    )
+
+def _trigrams(text):
+    """Return the set of 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _build_search_index():
+    """Precompute lowercase search keys and the n-gram index for search_clients."""
+    global _SEARCH_KEYS, _NGRAM_INDEX
+    
+    names_lc = [name.lower() for name in CLIENT_NAMES]
+    ids_lc = [client_id.lower() for client_id in CLIENT_IDS]
+    
+    # Query terms never contain whitespace, so a term can't straddle the newline
+    # separator: "term in key" is the same as "term in name or term in id"
+    _SEARCH_KEYS = [f"{name}\n{client_id}" for name, client_id in zip(names_lc, ids_lc)]
+    
+    # Every substring of up to 3 characters is indexed, so short query terms are
+    # looked up directly and longer ones through their trigrams. Name and ID are
+    # indexed separately so no n-gram spans the two fields.
+    index = {}
+    for i in range(len(CLIENT_IDS)):
+        grams = set()
+        for field in (names_lc[i], ids_lc[i]):
+            for size in (1, 2, 3):
+                grams.update(field[j:j + size] for j in range(len(field) - size + 1))
+        for gram in grams:
+            index.setdefault(gram, set()).add(i)
+    _NGRAM_INDEX = index
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then lets one probe through per cooldown."""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name, failure_threshold=5, cooldown=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failure_count = 0
+        self.opened_at = 0.0
+    
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        
+        # Open (or a probe already in flight): only let one probe through per cooldown window
+        now = time.monotonic()
+        if now - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self.opened_at = now
+            return True
+        
         return False
+    
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failure_count = 0
+    
+    def record_failure(self):
+        self.failure_count += 1
+        if self.state == self.HALF_OPEN or self.failure_count >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            log.warning("Circuit breaker '%s' open - failing fast for %.0fs", self.name, self.cooldown)
+
+class RetryableStatusError(Exception):
+    """Raised for HTTP statuses that are worth retrying (5xx and 429)."""
+    
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+# Transient failures that are retried; other 4xx responses are returned as-is
+_TRANSIENT_ERRORS = (aiohttp.ClientConnectorError, asyncio.TimeoutError, RetryableStatusError)
+
+_TRADES_BREAKER = CircuitBreaker("trades")
+_TRADES_BULKHEAD = asyncio.Semaphore(TRADES_MAX_CONCURRENCY)
+
+# (kind, client_id) -> (fetched_at, result); failed calls are never cached
+_API_CACHE = {}
+
+async def _cached_get(kind, client_id, ttl, fetcher):
+    """Return fetcher(client_id), reusing a result fetched less than ttl seconds ago."""
+    key = (kind, client_id)
+    cached = _API_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        log.debug("Using cached %s for client %s", kind, client_id)
+        return cached[1]
+    
+    result = await fetcher(client_id)
+    if result is not None:
+        _API_CACHE[key] = (time.monotonic(), result)
+    return result
+
+def clear_api_cache():
+    """Drop all cached API results."""
+    _API_CACHE.clear()
+
+async def retry_with_jitter(call, attempts=API_MAX_ATTEMPTS, base=API_BACKOFF_BASE, cap=API_BACKOFF_MAX):
+    """Await call(), retrying transient errors with exponential backoff and full jitter."""
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except _TRANSIENT_ERRORS:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+async def _request_trades(url):
+    """Single trades API request, returning (status, trades or None)."""
+    session = await get_session()
+    async with session.get(url) as response:
+        if response.status == 429 or response.status >= 500:
+            raise RetryableStatusError(response.status)
+        if response.status == 200:
+            return response.status, orjson.loads(await response.read())
+        return response.status, None
 
 async def get_client_trades(client_id):
+    """Fetch last 5 trades for a client, cached for TRADES_CACHE_TTL seconds."""
+    return await _cached_get('trades', client_id, TRADES_CACHE_TTL, _fetch_client_trades)
+
+async def _fetch_client_trades(client_id):
     """Fetch last 5 trades for a client from the trades API."""
+    if not _TRADES_BREAKER.allow_request():
+        log.warning("Trades API circuit is open - skipping call")
+        return None
+    
+    # Wait briefly for a free slot rather than piling more requests onto the backend
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{TRADES_API_BASE_URL}/trades/{client_id}"
-            print(f"Calling trades API: {url}")
-            
-            async with session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    trades = await response.json()
-                    print(f"Retrieved {len(trades)} trades for client {client_id}")
-                    return trades
-                elif response.status == 404:
-                    print(f"No trades found for client {client_id}")
-                    return []
-                else:
-                    print(f"Trades API returned status {response.status}")
-                    return None
-                    
+        await asyncio.wait_for(_TRADES_BULKHEAD.acquire(), timeout=TRADES_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        log.warning("Trades API busy - too many requests in flight")
+        return None
+    
+    try:
+        url = f"{TRADES_API_BASE_URL}/trades/{client_id}"
+        log.debug("Calling trades API: %s", url)
+        
+        status, trades = await retry_with_jitter(lambda: _request_trades(url))
+        _TRADES_BREAKER.record_success()
+        
+        if status == 200:
+            log.info("Retrieved %d trades for client %s", len(trades), client_id)
+            return trades
+        elif status == 404:
+            log.info("No trades found for client %s", client_id)
+            return []
+        else:
+            log.warning("Trades API returned status %s", status)
+            return None
+                
     except aiohttp.ClientConnectorError:
-        print("Cannot connect to trades API - is it running on port 8001?")
+        _TRADES_BREAKER.record_failure()
+        log.error("Cannot connect to trades API - is it running on port 8001?")
         return None
     except asyncio.TimeoutError:
-        print("Trades API request timed out")
+        _TRADES_BREAKER.record_failure()
+        log.error("Trades API request timed out")
+        return None
+    except RetryableStatusError as e:
+        _TRADES_BREAKER.record_failure()
+        log.error("Trades API returned status %s", e.status)
         return None
     except Exception as e:
-        print(f"Error calling trades API: {e}")
+        _TRADES_BREAKER.record_failure()
+        log.error("Error calling trades API: %s", e)
         return None
+    finally:
+        _TRADES_BULKHEAD.release()
 
 async def get_client_status(client_id):
+    """Fetch client status, cached for STATUS_CACHE_TTL seconds."""
+    return await _cached_get('status', client_id, STATUS_CACHE_TTL, _fetch_client_status)
+
+async def _fetch_client_status(client_id):
     """Fetch client status from the status API."""
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{TRADES_API_BASE_URL}/status/{client_id}"
-            print(f"Calling status API: {url}")
-            
-            async with session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    status = await response.json()
-                    print(f"Retrieved status for client {client_id}: {status.get('status_line', 'Unknown')}")
-                    return status
-                elif response.status == 404:
-                    print(f"No status found for client {client_id}")
-                    return None
-                else:
-                    print(f"Status API returned status {response.status}")
-                    return None
-                    
+        session = await get_session()
+        url = f"{TRADES_API_BASE_URL}/status/{client_id}"
+        log.debug("Calling status API: %s", url)
+        
+        async with session.get(url) as response:
+            if response.status == 200:
+                status = orjson.loads(await response.read())
+                log.info("Retrieved status for client %s: %s", client_id, status.get('status_line', 'Unknown'))
+                return status
+            elif response.status == 404:
+                log.info("No status found for client %s", client_id)
+                return None
+            else:
+                log.warning("Status API returned status %s", response.status)
+                return None
+                
     except aiohttp.ClientConnectorError:
-        print("Cannot connect to status API - is it running on port 8001?")
+        log.error("Cannot connect to status API - is it running on port 8001?")
         return None
     except asyncio.TimeoutError:
-        print("Status API request timed out")
+        log.error("Status API request timed out")
         return None
     except Exception as e:
-        print(f"Error calling status API: {e}")
+        log.error("Error calling status API: %s", e)
         return None
 
 async def get_client_credit_lines(client_id):
+    """Fetch client credit lines, cached for CREDIT_CACHE_TTL seconds."""
+    return await _cached_get('credit', client_id, CREDIT_CACHE_TTL, _fetch_client_credit_lines)
+
+async def _fetch_client_credit_lines(client_id):
     """Fetch client credit lines from the credit API."""
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{TRADES_API_BASE_URL}/credit/{client_id}"
-            print(f"Calling credit API: {url}")
-            
-            async with session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    credit = await response.json()
-                    print(f"Retrieved credit lines for client {client_id}: {credit.get('credit_line', 'Unknown')}")
-                    return credit
-                elif response.status == 404:
-                    print(f"No credit lines found for client {client_id}")
-                    return None
-                else:
-                    print(f"Credit API returned status {response.status}")
-                    return None
-                    
+        session = await get_session()
+        url = f"{TRADES_API_BASE_URL}/credit/{client_id}"
+        log.debug("Calling credit API: %s", url)
+        
+        async with session.get(url) as response:
+            if response.status == 200:
+                credit = orjson.loads(await response.read())
+                log.info("Retrieved credit lines for client %s: %s", client_id, credit.get('credit_line', 'Unknown'))
+                return credit
+            elif response.status == 404:
+                log.info("No credit lines found for client %s", client_id)
+                return None
+            else:
+                log.warning("Credit API returned status %s", response.status)
+                return None
+                
     except aiohttp.ClientConnectorError:
-        print("Cannot connect to credit API - is it running on port 8001?")
+        log.error("Cannot connect to credit API - is it running on port 8001?")
         return None
     except asyncio.TimeoutError:
-        print("Credit API request timed out")
+        log.error("Credit API request timed out")
         return None
     except Exception as e:
-        print(f"Error calling credit API: {e}")
+        log.error("Error calling credit API: %s", e)
         return None
 
-def create_trades_table(trades, client_name):
-    """Create compact trades table with link-style clickable trade numbers for document download."""
-    if not trades:
-        return f"""<div style="font-size: 10px; padding: 4px; border-radius: 2px; margin-top: 4px;">
+async def get_api_health():
+    """Fetch the API health summary, cached for HEALTH_CACHE_TTL seconds.
+    
+    Any status other than 200 (including other 2xx codes) raises
+    aiohttp.ClientResponseError and is never cached.
+    """
+    return await _cached_get('health', None, HEALTH_CACHE_TTL, _fetch_api_health)
+
+async def _fetch_api_health(_):
+    """Fetch the API health summary from the health endpoint."""
+    session = await get_session()
+    async with session.get(f"{TRADES_API_BASE_URL}/health", timeout=HEALTH_CHECK_TIMEOUT) as response:
+        # raise_for_status() would let a non-200 2xx through to the JSON parse
+        if response.status != 200:
+            raise aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=response.reason or "",
+                headers=response.headers
+            )
+        return orjson.loads(await response.read())
+
+# Trades table markup. MessageML has no stylesheets, so cell styles stay inline
+# but are defined once here and rows are rendered from a single template.
+_TRADE_CELL_STYLE = "padding: 1px 3px; border: 1px solid #dee2e6;"
+_TRADE_COLUMNS = ("Trade#", "Date", "Product", "Dir", "Currency Pair", "Amount", "Price", "Spread")
+
+_TRADES_TABLE_HEADER = (
+    '<div style="font-size: 9px; padding: 4px; border-radius: 2px; margin-top: 4px;">'
+    '<b style="font-size: 10px;">📊 Last {count} trade(s) for {client_name}:</b><br/>'
+    '<form id="{form_id}">'
+    '<table style="width: 100%; font-size: 8px; border-collapse: collapse; margin-top: 2px;">'
+    '<tr>'
+    + "".join(f'<th style="{_TRADE_CELL_STYLE} font-size: 7px;">{title}</th>' for title in _TRADE_COLUMNS)
+    + '</tr>'
+)
+
+_TRADE_ROW_TEMPLATE = (
+    '<tr>'
+    f'<td style="{_TRADE_CELL_STYLE} font-size: 7px;">'
+    '<button name="trade_doc_{trade_number}" type="action">{trade_number}</button></td>'
+    f'<td style="{_TRADE_CELL_STYLE}">{{trade_date}}</td>'
+    f'<td style="{_TRADE_CELL_STYLE}">{{product}}</td>'
+    f'<td style="{_TRADE_CELL_STYLE} color: {{dir_color}}; font-weight: bold;">{{direction}}</td>'
+    f'<td style="{_TRADE_CELL_STYLE}">{{currency_pair}}</td>'
+    f'<td style="{_TRADE_CELL_STYLE}">{{amount}}</td>'
+    f'<td style="{_TRADE_CELL_STYLE}">{{price}}</td>'
+    f'<td style="{_TRADE_CELL_STYLE}">{{spread}}</td>'
+    '</tr>'
+)
+
+_TRADES_TABLE_FOOTER = '</table></form></div>'
+
+_NO_TRADES_TEMPLATE = """<div style="font-size: 10px; padding: 4px; border-radius: 2px; margin-top: 4px;">
             <b>📊 No trades found for {client_name}</b>
         </div>"""
+
+# Direction text colours: green for Buy, red for Sell, grey otherwise
+_DIR_COLOR = {'Buy': '#28a745', 'Sell': '#dc3545'}
+_DIR_COLOR_DEFAULT = '#6c757d'
+
+def _escape(value):
+    """HTML-escape any API value for interpolation into MessageML."""
+    return html.escape(str(value))
+
+def _format_amount(value):
+    """Format an amount with thousands separators; non-numeric values pass through."""
+    # Numbers from the JSON payload take the fast path, no float() or exception needed
+    if isinstance(value, (int, float)):
+        return format(value, ',.0f')
+    if value is None:
+        return 'N/A'
+    try:
+        return format(float(value), ',.0f')
+    except (ValueError, TypeError):
+        return value
+
+def create_trades_table(trades, client_name):
+    """Create compact trades table with link-style clickable trade numbers for document download.
     
-    # Generate unique form ID
-    import time
-    form_id = f"trades_table_{int(time.time())}"
-    
-    # Create compact table with minimal download buttons
-    table_html = f"""<div style="font-size: 9px; padding: 4px; border-radius: 2px; margin-top: 4px;">
-        <b style="font-size: 10px;">📊 Last {len(trades)} trade(s) for {client_name}:</b><br/>
-        <form id="{form_id}">
-        <table style="width: 100%; font-size: 8px; border-collapse: collapse; margin-top: 2px;">
-            <tr>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Trade#</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Date</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Product</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Dir</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Currency Pair</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Amount</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Price</th>
-                <th style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">Spread</th>
-            </tr>
+    client_name must already be HTML-escaped; trade fields are escaped here.
     """
+    if not trades:
+        return _NO_TRADES_TEMPLATE.format(client_name=client_name)
+    
+    # Generate unique form ID
+    form_id = f"trades_table_{time.monotonic_ns()}"
+    
+    # Bind the per-row callables to locals once for the loop
+    format_row = _TRADE_ROW_TEMPLATE.format
+    escape = _escape
     
+    rows = []
     for trade in trades:
-        # Format direction as Buy/Sell with color
-        direction = trade.get('direction', 'N/A')
-        dir_color = '#28a745' if direction == 'Buy' else '#dc3545' if direction == 'Sell' else '#6c757d'
+        get = trade.get
+        direction = get('direction', 'N/A')
         
-        # Format amount with thousands separator
-        try:
-            amount = f"{float(trade.get('notional_amount', 0)):,.0f}"
-        except:
-            amount = trade.get('notional_amount', 'N/A')
-        
-        # Create minimal download button with just down arrow
-        trade_number = trade.get('trade_number', 'N/A')
-        download_button = f'<button name="trade_doc_{trade_number}" type="action">{trade_number}</button>'
-        
-        table_html += f"""
-            <tr>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6; font-size: 7px;">{download_button}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6;">{trade.get('trade_date', 'N/A')}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6;">{trade.get('product', 'N/A')}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6; color: {dir_color}; font-weight: bold;">{direction}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6;">{trade.get('currency_pair', 'N/A')}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6;">{amount}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6;">{trade.get('price', 'N/A')}</td>
-                <td style="padding: 1px 3px; border: 1px solid #dee2e6;">{trade.get('spread', 'N/A')}</td>
-            </tr>
-        """
-    
-    table_html += """
-        </table>
-        </form>
-    </div>"""
+        rows.append(format_row(
+            trade_number=escape(get('trade_number', 'N/A')),
+            trade_date=escape(get('trade_date', 'N/A')),
+            product=escape(get('product', 'N/A')),
+            dir_color=_DIR_COLOR.get(direction, _DIR_COLOR_DEFAULT),
+            direction=escape(direction),
+            currency_pair=escape(get('currency_pair', 'N/A')),
+            amount=escape(_format_amount(get('notional_amount', 0))),
+            price=escape(get('price', 'N/A')),
+            spread=escape(get('spread', 'N/A')),
+        ))
     
-    return table_html
+    header = _TRADES_TABLE_HEADER.format(count=len(trades), client_name=client_name, form_id=form_id)
+    return header + "".join(rows) + _TRADES_TABLE_FOOTER
+
+# Trade document messages (callers escape every interpolated value with _escape)
+_TRADE_DOC_ACK_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 4px; border-radius: 2px; border-left: 3px solid #007bff;">
+        <b>📄 Fetching contract for trade {trade_number}, {user_first_name}...</b>
+    </div>
+</messageML>"""
+
+_TRADE_DOC_SENT_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 4px; border-radius: 2px; border-left: 3px solid #28a745;">
+        <b>Here you go {user_first_name}, here is the contract for trade number: {trade_number}</b><br/>
+        <i>File: {filename} ({file_size:,} bytes)</i>
+    </div>
+</messageML>"""
+
+_TRADE_DOC_NOT_FOUND_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 4px; border-radius: 2px; border-left: 3px solid #dc3545;">
+        <b>❌ Sorry {user_first_name}, contract not found for trade {trade_number}</b><br/>
+        <i>The trade contract may not be available in our system</i>
+    </div>
+</messageML>"""
+
+_TRADE_DOC_NO_NUMBER_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 4px; border-radius: 2px;">
+        <b>❌ No trade number detected, {user_first_name}</b>
+    </div>
+</messageML>"""
+
+# Button name prefixes used by the trades table, the search results form and the favourites bar
+_TRADE_DOC_BUTTON_PREFIXES = ("trade_doc_",)
+_CLIENT_BUTTON_PREFIXES = ("client_", "fav_")
+
+def _find_button_target(form_values, prefixes):
+    """Return the pressed button's name with its prefix stripped, or None.
+
+    Symphony sends the button name as the value of the "action" field, or
+    sometimes as the field key itself. Each field is checked once.
+    """
+    for key, value in form_values.items():
+        log.debug("Checking form field: %s = %s", key, value)
+        candidate = value if key == "action" and isinstance(value, str) else key
+        for prefix in prefixes:
+            stripped = candidate.removeprefix(prefix)
+            if stripped != candidate:
+                return stripped
+    return None
 
 class TradeDocumentActivity(FormReplyActivity):
     """Handles trade document download requests."""
@@ -223,24 +594,14 @@ class TradeDocumentActivity(FormReplyActivity):
         return context.form_id.startswith("trades_table_")
     
     async def on_activity(self, context: FormReplyContext):
-        print(f"TradeDocumentActivity triggered by {context.initiator.user.display_name}")
-        print(f"Form ID: {context.form_id}")
-        print(f"Form values: {context.form_values}")
+        log.info("TradeDocumentActivity triggered by %s", context.initiator.user.display_name)
+        log.debug("Form ID: %s", context.form_id)
+        log.debug("Form values: %s", context.form_values)
         
         # Extract trade number from form values
-        trade_number = None
+        trade_number = _find_button_target(context.form_values, _TRADE_DOC_BUTTON_PREFIXES)
         
-        for key, value in context.form_values.items():
-            print(f"Checking form field: {key} = {value}")
-            
-            if key == "action" and value and value.startswith("trade_doc_"):
-                trade_number = value[10:]  # Remove "trade_doc_" prefix
-                break
-            elif key.startswith("trade_doc_"):
-                trade_number = key[10:]  # Remove "trade_doc_" prefix
-                break
-        
-        print(f"Extracted trade number: {trade_number}")
+        log.debug("Extracted trade number: %s", trade_number)
         
         # Get the correct stream ID
         stream_id = context.source_event.stream.stream_id
@@ -251,170 +612,192 @@ class TradeDocumentActivity(FormReplyActivity):
         
         if trade_number:
             # Send acknowledgment message with personalized greeting
-            ack_message = f"""<messageML>
-                <div style="font-size: 10px; padding: 4px; border-radius: 2px; border-left: 3px solid #007bff;">
-                    <b>📄 Fetching contract for trade {trade_number}, {user_first_name}...</b>
-                </div>
-            </messageML>"""
+            ack_message = _TRADE_DOC_ACK_TEMPLATE.format(
+                trade_number=_escape(trade_number), user_first_name=_escape(user_first_name)
+            )
             await self._messages.send_message(stream_id, ack_message)
             
             # Download the trade document
             success = await self._download_and_send_trade_document(stream_id, trade_number, user_first_name)
             
             if not success:
-                error_message = f"""<messageML>
-                    <div style="font-size: 10px; padding: 4px; border-radius: 2px; border-left: 3px solid #dc3545;">
-                        <b>❌ Sorry {user_first_name}, contract not found for trade {trade_number}</b><br/>
-                        <i>The trade contract may not be available in our system</i>
-                    </div>
-                </messageML>"""
+                error_message = _TRADE_DOC_NOT_FOUND_TEMPLATE.format(
+                    trade_number=_escape(trade_number), user_first_name=_escape(user_first_name)
+                )
                 await self._messages.send_message(stream_id, error_message)
         else:
-            error_message = f"""<messageML>
-                <div style="font-size: 10px; padding: 4px; border-radius: 2px;">
-                    <b>❌ No trade number detected, {user_first_name}</b>
-                </div>
-            </messageML>"""
+            error_message = _TRADE_DOC_NO_NUMBER_TEMPLATE.format(user_first_name=_escape(user_first_name))
             await self._messages.send_message(stream_id, error_message)
     
     async def _download_and_send_trade_document(self, stream_id, trade_number, user_first_name):
         """Download trade document from API and send as attachment with personalized message."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{TRADES_API_BASE_URL}/document/{trade_number}"
-                print(f"Calling trade document API: {url}")
-                
-                async with session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        # Get the file content and filename from response
-                        file_content = await response.read()
-                        
-                        # Try to get filename from Content-Disposition header
-                        content_disposition = response.headers.get('content-disposition', '')
-                        if 'filename=' in content_disposition:
-                            filename = content_disposition.split('filename=')[1].strip('"')
-                        else:
-                            # Fallback to trade number with extension
-                            filename = f"{trade_number}.pdf"
-                        
-                        print(f"Downloaded {len(file_content)} bytes for {filename}")
-                        
-                        # Create a temporary file-like object for the attachment
-                        import io
-                        file_obj = io.BytesIO(file_content)
-                        file_obj.name = filename  # Set the filename attribute
-                        
-                        # Send personalized message with attachment
-                        message_with_doc = f"""<messageML>
-                            <div style="font-size: 10px; padding: 4px; border-radius: 2px; border-left: 3px solid #28a745;">
-                                <b>Here you go {user_first_name}, here is the contract for trade number: {trade_number}</b><br/>
-                                <i>File: {filename} ({len(file_content):,} bytes)</i>
-                            </div>
-                        </messageML>"""
-                        
-                        await self._messages.send_message(
-                            stream_id, 
-                            message_with_doc,
-                            attachment=[file_obj]
-                        )
-                        
-                        print(f"✅ Successfully sent contract {filename} for trade {trade_number} to {user_first_name}")
-                        return True
-                        
-                    elif response.status == 404:
-                        print(f"❌ Contract not found for trade {trade_number}")
-                        return False
+            session = await get_session()
+            url = f"{TRADES_API_BASE_URL}/document/{trade_number}"
+            log.debug("Calling trade document API: %s", url)
+            
+            async with session.get(url, timeout=DOCUMENT_TIMEOUT) as response:
+                if response.status == 200:
+                    # Try to get filename from Content-Disposition header
+                    content_disposition = response.headers.get('content-disposition', '')
+                    if 'filename=' in content_disposition:
+                        filename = content_disposition.split('filename=')[1].strip('"')
                     else:
-                        print(f"❌ Document API returned status {response.status}")
-                        return False
-                        
+                        # Fallback to trade number with extension
+                        filename = f"{trade_number}.pdf"
+                    
+                    # Stream the body chunk by chunk into a temporary file rather than memory.
+                    # It is a real file (an io.IOBase on every Python version, as the BDK
+                    # requires) in a private directory, named so its basename is the filename
+                    # the BDK sends with the attachment.
+                    with tempfile.TemporaryDirectory() as tmp_dir:
+                        tmp_path = Path(tmp_dir) / (Path(filename).name or f"{trade_number}.pdf")
+                        with open(tmp_path, 'w+b') as file_obj:
+                            async for chunk in response.content.iter_chunked(DOCUMENT_CHUNK_SIZE):
+                                file_obj.write(chunk)
+                            file_size = file_obj.tell()
+                            file_obj.seek(0)
+                            
+                            log.debug("Downloaded %d bytes for %s", file_size, filename)
+                            
+                            # Send personalized message with attachment
+                            message_with_doc = _TRADE_DOC_SENT_TEMPLATE.format(
+                                user_first_name=_escape(user_first_name),
+                                trade_number=_escape(trade_number),
+                                filename=_escape(filename),
+                                file_size=file_size
+                            )
+                            
+                            await self._messages.send_message(
+                                stream_id, 
+                                message_with_doc,
+                                attachment=[file_obj]
+                            )
+                    
+                    log.info("Sent contract %s for trade %s to %s", filename, trade_number, user_first_name)
+                    return True
+                    
+                elif response.status == 404:
+                    log.warning("Contract not found for trade %s", trade_number)
+                    return False
+                else:
+                    log.warning("Document API returned status %s", response.status)
+                    return False
+                    
         except aiohttp.ClientConnectorError:
-            print("❌ Cannot connect to document API")
+            log.error("Cannot connect to document API")
             return False
         except asyncio.TimeoutError:
-            print("❌ Document API request timed out")
+            log.error("Document API request timed out")
             return False
         except Exception as e:
-            print(f"❌ Error downloading trade contract: {e}")
+            log.error("Error downloading trade contract: %s", e)
             return False
 
 def search_clients(query):
-    """Search clients by name and ID."""
+    """Search clients by name and ID, returning matching client indices."""
     if not query:
         return []
     
-    query = query.lower().strip()
-    matches = []
+    # Split query into terms once, up front
+    query_terms = query.lower().split()
     
-    for client in CLIENTS:
-        client_name_lower = client['client_name'].lower()
-        client_id_lower = client['client_id'].lower()
-        
-        # Split query into terms
-        query_terms = query.split()
-        
-        # Check if all query terms match either name or ID
-        match = True
-        for term in query_terms:
-            if term not in client_name_lower and term not in client_id_lower:
-                match = False
-                break
-        
-        if match:
-            matches.append(client)
+    # Narrow down candidates with the n-gram index
+    candidates = None
+    for term in query_terms:
+        for gram in ((term,) if len(term) <= 3 else _trigrams(term)):
+            postings = _NGRAM_INDEX.get(gram, _EMPTY_POSTINGS)
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+    
+    if candidates is None:
+        # Whitespace-only query: no terms, so every client matches
+        candidates = range(len(CLIENT_IDS))
+    else:
+        candidates = sorted(candidates)
+    
+    # Check if all query terms match either name or ID; the per-term substring
+    # checks run inside all()/map() in C rather than a Python-level generator
+    search_keys = _SEARCH_KEYS
+    matches = [
+        i for i in candidates
+        if all(map(search_keys[i].__contains__, query_terms))
+    ]
     
     # Sort matches: favourites first, then by name
-    matches.sort(key=lambda x: (not x['is_favourite'], x['client_name']))
+    matches.sort(key=lambda i: (not CLIENT_FAV[i], CLIENT_NAMES[i]))
     
     return matches
 
-def create_client_selection_form(matches, request_id):
-    """Create Symphony Elements form for client selection."""
-    if not matches:
-        return "<messageML>No clients found matching your search.</messageML>"
-    
-    form_html = f"""<messageML>
+# Client search results form and favourites bar markup
+_CLIENT_FORM_HEADER = """<messageML>
         <h3>📋 Client Search Results</h3>
         <form id="client_selection_{request_id}">
             <h4>Select Client:</h4>
     """
-    
-    # Add client selection buttons - use name attribute with client_id as value
-    for i, client in enumerate(matches):
-        favourite_star = "⭐ " if client['is_favourite'] else ""
-        button_name = f"client_{client['client_id']}"
-        form_html += f"""
-            <button name="{button_name}" type="action">
-                {favourite_star}{client['client_name']} - ID: {client['client_id']}
+
+_CLIENT_BUTTON_TEMPLATE = """
+            <button name="client_{client_id}" type="action">
+                {favourite_star}{client_name} - ID: {client_id}
             </button><br/>
         """
-    
-    form_html += """
+
+_CLIENT_FORM_FOOTER = """
         </form>
     </messageML>"""
+
+_FAVOURITES_BAR_HEADER = """
+        <h4>⭐ Favourite Clients:</h4>
+        <form id="favourites_bar">
+    """
+
+_FAVOURITE_BUTTON_TEMPLATE = """
+            <button name="fav_{client_id}" type="action">
+                {client_name} ({client_id})
+            </button>
+        """
+
+_FAVOURITES_BAR_FOOTER = "</form>"
+
+def create_client_selection_form(matches, request_id):
+    """Create Symphony Elements form for client selection."""
+    if not matches:
+        return "<messageML>No clients found matching your search.</messageML>"
     
-    return form_html
+    return "".join((
+        _CLIENT_FORM_HEADER.format(request_id=request_id),
+        "".join(map(_CLIENT_BUTTONS_HTML.__getitem__, matches)),
+        _CLIENT_FORM_FOOTER
+    ))
 
 def create_favourites_bar():
+    """Return the favourites bar, pre-rendered when the CSV was last loaded."""
+    return _FAVOURITES_HTML
+
+def _render_favourites_bar():
     """Create favourites bar with top 10 favourite clients."""
     if not FAVOURITES:
         return ""
     
-    favourites_html = """
-        <h4>⭐ Favourite Clients:</h4>
-        <form id="favourites_bar">
-    """
+    parts = [_FAVOURITES_BAR_HEADER]
     
-    for client in FAVOURITES:
-        button_name = f"fav_{client['client_id']}"
-        favourites_html += f"""
-            <button name="{button_name}" type="action">
-                {client['client_name']} ({client['client_id']})
-            </button>
-        """
+    for i in FAVOURITES:
+        parts.append(_FAVOURITE_BUTTON_TEMPLATE.format(
+            client_id=CLIENT_IDS_ML[i],
+            client_name=CLIENT_NAMES_ML[i]
+        ))
     
-    favourites_html += "</form>"
-    return favourites_html
+    parts.append(_FAVOURITES_BAR_FOOTER)
+    return "".join(parts)
+
+# Monotonic IDs for search result forms (second-resolution timestamps could collide)
+_SEARCH_REQUEST_IDS = itertools.count(1)
+
+# Message triggers for ClientSearchActivity (matched against lowercased text)
+_FIND_PREFIX = "find "
+_FAVOURITES_COMMANDS = frozenset({"fav"})
+_MAX_COMMAND_LENGTH = max(map(len, _FAVOURITES_COMMANDS))
 
 class ClientSearchActivity(CommandActivity):
     """Handles client searches - responds to 'find' keyword or any message in client-lookup room."""
@@ -424,50 +807,48 @@ class ClientSearchActivity(CommandActivity):
         super().__init__()
     
     def matches(self, context: CommandContext) -> bool:
-        text = context.text_content.lower().strip()
+        text = context.text_content.strip()
         
-        # Don't match slash commands (let the slash command decorators handle those)
-        if text.startswith('/'):
-            return False
+        # Most messages are ordinary chatter, so reject cheaply: only the first few
+        # characters are lowercased, and only short messages can be a command.
+        # Slash commands can't match either trigger, leaving them to the slash
+        # command decorators.
         
         # Method 1: Messages starting with "find" in any room
-        if text.startswith("find "):
+        if text[:len(_FIND_PREFIX)].lower() == _FIND_PREFIX:
             return True
         
         # Method 2: Simple "fav" command to show favourites
-        if text == "fav":
-            return True
-        
-        return False
+        return len(text) <= _MAX_COMMAND_LENGTH and text.lower() in _FAVOURITES_COMMANDS
     
     async def on_activity(self, context: CommandContext):
-        print(f"ClientSearchActivity triggered by {context.initiator.user.display_name}")
-        print(f"Search text: '{context.text_content}'")
+        log.info("ClientSearchActivity triggered by %s", context.initiator.user.display_name)
+        log.debug("Search text: '%s'", context.text_content)
         
         text = context.text_content.strip()
+        text_lower = text.lower()
         
         # Check if this is the "fav" command
-        if text.lower() == "fav":
-            print("Showing favourites")
+        if text_lower in _FAVOURITES_COMMANDS:
+            log.debug("Showing favourites")
             favourites_message = create_favourites_bar()
             await self._messages.send_message(context.stream_id, favourites_message)
             return
         
         # Extract search query
-        if text.lower().startswith("find "):
-            query = text[5:]  # Remove "find " prefix
+        if text_lower.startswith(_FIND_PREFIX):
+            query = text[len(_FIND_PREFIX):]  # Remove "find " prefix
         else:
             query = text  # Assume entire message is the search query
         
-        print(f"Search query: '{query}'")
+        log.debug("Search query: '%s'", query)
         
         # Perform search
         matches = search_clients(query)
-        print(f"Found {len(matches)} matches")
+        log.debug("Found %d matches", len(matches))
         
         # Generate unique request ID
-        import time
-        request_id = str(int(time.time()))
+        request_id = str(next(_SEARCH_REQUEST_IDS))
         
         # Create response with search results (no favourites embedded)
         if matches:
@@ -476,12 +857,13 @@ class ClientSearchActivity(CommandActivity):
             # No matches found
             response = f"""<messageML>
                 <div style="font-size: 10px; padding: 4px; border-radius: 2px;">
-                    No matches for "{query}"
+                    No matches for "{html.escape(query)}"
                 </div>
             </messageML>"""
         
         await self._messages.send_message(context.stream_id, response)
 
+
 class ClientSelectionFormActivity(FormReplyActivity):
     """Handles client selection from the form."""
     
@@ -495,61 +877,60 @@ class ClientSelectionFormActivity(FormReplyActivity):
                 context.form_id == "favourites_bar")
     
     async def on_activity(self, context: FormReplyContext):
-        print(f"ClientSelectionFormActivity triggered by {context.initiator.user.display_name}")
-        print(f"Form ID: {context.form_id}")
-        print(f"Form values: {context.form_values}")
+        log.info("ClientSelectionFormActivity triggered by %s", context.initiator.user.display_name)
+        log.debug("Form ID: %s", context.form_id)
+        log.debug("Form values: %s", context.form_values)
         
         # Extract client ID from form values
-        selected_client_id = None
+        selected_client_id = _find_button_target(context.form_values, _CLIENT_BUTTON_PREFIXES)
         
-        # Check all form values for client selection
-        for key, value in context.form_values.items():
-            print(f"Checking form field: {key} = {value}")
-            
-            if key == "action" and value:
-                # Symphony sends button name as the value of "action" field
-                button_name = value
-                if button_name.startswith("client_"):
-                    selected_client_id = button_name[7:]  # Remove "client_" prefix
-                elif button_name.startswith("fav_"):
-                    selected_client_id = button_name[4:]  # Remove "fav_" prefix
-                break
-            elif key.startswith("client_") or key.startswith("fav_"):
-                # Alternative: if button name is the key itself
-                if key.startswith("client_"):
-                    selected_client_id = key[7:]  # Remove "client_" prefix
-                elif key.startswith("fav_"):
-                    selected_client_id = key[4:]  # Remove "fav_" prefix
-                break
-        
-        print(f"Extracted client ID: {selected_client_id}")
+        log.debug("Extracted client ID: %s", selected_client_id)
         
         # Get the correct stream ID for FormReplyContext
         stream_id = context.source_event.stream.stream_id
         
         if selected_client_id:
             # Find the selected client
-            selected_client = None
-            for client in CLIENTS:
-                if client['client_id'] == selected_client_id:
-                    selected_client = client
-                    break
+            selected_index = CLIENT_BY_ID.get(selected_client_id)
             
-            if selected_client:
-                favourite_star = "⭐ " if selected_client['is_favourite'] else ""
+            if selected_index is not None:
+                client_name = CLIENT_NAMES[selected_index]
+                client_name_ml = CLIENT_NAMES_ML[selected_index]
+                favourite_star = "⭐ " if CLIENT_FAV[selected_index] else ""
+                
+                # Fetch status, credit lines and trades concurrently while the
+                # confirmation message is being sent
+                log.debug("Fetching status, credit lines and trades for client %s", selected_client_id)
+                lookups = asyncio.gather(
+                    get_client_status(selected_client_id),
+                    get_client_credit_lines(selected_client_id),
+                    get_client_trades(selected_client_id),
+                    return_exceptions=True
+                )
                 
                 # Send confirmation message first
                 response = f"""<messageML>
                     <div style="font-size: 10px; padding: 6px; border-radius: 2px; border-left: 3px solid #28a745;">
-                        <b style="font-size: 11px;">✅ {favourite_star}{selected_client['client_name']} - {selected_client['client_id']}</b><br/>
+                        <b style="font-size: 11px;">✅ {favourite_star}{client_name_ml} - {CLIENT_IDS_ML[selected_index]}</b><br/>
                     </div>
                 </messageML>"""
                 
-                await self._messages.send_message(stream_id, response)
+                try:
+                    await self._messages.send_message(stream_id, response)
+                except BaseException:
+                    # Don't leave the lookups running unawaited if the send fails or is cancelled
+                    lookups.cancel()
+                    try:
+                        await lookups
+                    except asyncio.CancelledError:
+                        pass
+                    raise
                 
-                # Fetch client status
-                print(f"Fetching status for client {selected_client_id}")
-                status = await get_client_status(selected_client_id)
+                # Treat any unexpected exception like a failed API call
+                status, credit, trades = [
+                    None if isinstance(result, BaseException) else result
+                    for result in await lookups
+                ]
                 
                 if status:
                     # Display status as traffic lights
@@ -561,10 +942,6 @@ class ClientSelectionFormActivity(FormReplyActivity):
                     </messageML>"""
                     await self._messages.send_message(stream_id, status_message)
                 
-                # Fetch client credit lines
-                print(f"Fetching credit lines for client {selected_client_id}")
-                credit = await get_client_credit_lines(selected_client_id)
-                
                 if credit:
                     # Display credit lines as traffic lights
                     credit_message = f"""<messageML>
@@ -575,25 +952,25 @@ class ClientSelectionFormActivity(FormReplyActivity):
                     </messageML>"""
                     await self._messages.send_message(stream_id, credit_message)
                 
-                # Fetch and display trades
-                print(f"Fetching trades for client {selected_client_id}")
-                trades = await get_client_trades(selected_client_id)
-                
+                # Display trades
                 if trades is not None:  # API call succeeded
-                    trades_table = create_trades_table(trades, selected_client['client_name'])
+                    trades_table = create_trades_table(trades, client_name_ml)
                     trades_message = f"<messageML>{trades_table}</messageML>"
                     await self._messages.send_message(stream_id, trades_message)
                 else:  # API call failed
                     error_message = f"""<messageML>
                         <div style="font-size: 10px; padding: 4px; border-radius: 2px; margin-top: 4px;">
-                            <b>⚠️ Could not fetch trades for {selected_client['client_name']}</b><br/>
+                            <b>⚠️ Could not fetch trades for {client_name_ml}</b><br/>
                             <i>Trades API may be unavailable</i>
                         </div>
                     </messageML>"""
                     await self._messages.send_message(stream_id, error_message)
                     
                 # Log the selection for trading workflow
-                print(f"TRADE LOG: User {context.initiator.user.display_name} selected client {selected_client['client_name']} (ID: {selected_client_id})")
+                log.info(
+                    "TRADE LOG: User %s selected client %s (ID: %s)",
+                    context.initiator.user.display_name, client_name, selected_client_id
+                )
             else:
                 await self._messages.send_message(
                     stream_id,
@@ -615,9 +992,76 @@ class ClientSelectionFormActivity(FormReplyActivity):
                 </messageML>"""
             )
 
+# /help message; only the loaded counts vary, so it is re-rendered on CSV load
+_HELP_TEMPLATE = """<messageML>
+    <h2>📞 Enhanced Client Lookup Bot - Help</h2>
+    
+    <h3>Quick Commands:</h3>
+    <ul>
+        <li><b>find juan 123</b> - Search for clients matching "juan" and "123"</li>
+        <li><b>find maria</b> - Search for clients named Maria</li>
+        <li><b>find 456</b> - Search for clients with ID containing 456</li>
+        <li><b>fav</b> - Show favourite clients instantly</li>
+    </ul>
+    
+    <h3>Features:</h3>
+    <ul>
+        <li>⭐ Favourite clients pinned at top of chat</li>
+        <li>🔍 Searches both name and ID</li>
+        <li>⚡ Ultra-fast selection with buttons</li>
+        <li>🚦 Client status with traffic lights</li>
+        <li>💳 Credit line utilization monitoring</li>
+        <li>📊 Last 5 trades history</li>
+        <li>📋 Use /favourites to refresh the pinned favourites</li>
+    </ul>
+    
+    <p><b>Loaded:</b> {clients} clients, {favourites} favourites</p>
+    <p><b>API Status:</b> Connected to {api_url}</p>
+</messageML>"""
+
+# /reload and /api replies; /reload carries the refreshed favourites bar in the same message
+_RELOAD_OK_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
+        <b>✅ Reloaded {clients} clients, {favourites} favourites from CSV</b>
+    </div>
+    {favourites_bar}
+</messageML>"""
+
+_RELOAD_FALLBACK_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
+        <b>⚠️ Using sample data: {clients} clients, {favourites} favourites</b>
+    </div>
+    {favourites_bar}
+</messageML>"""
+
+_API_HEALTHY_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
+        <b>✅ API Status: Healthy</b><br/>
+        📊 Trades: {trades}<br/>
+        🚦 Statuses: {statuses}<br/>
+        💳 Credit Lines: {credit_lines}<br/>
+        🔗 URL: {api_url}
+    </div>
+</messageML>"""
+
+_API_ERROR_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
+        <b>⚠️ API Status: Error {status}</b><br/>
+        🔗 URL: {api_url}
+    </div>
+</messageML>"""
+
+_API_UNAVAILABLE_TEMPLATE = """<messageML>
+    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
+        <b>❌ API Status: Unavailable</b><br/>
+        Error: {error}<br/>
+        🔗 URL: {api_url}
+    </div>
+</messageML>"""
+
 async def run():
     """Main function to configure and run the Client Lookup Bot."""
-    print("Starting Enhanced Client Lookup Bot for Traders...")
+    log.info("Starting Enhanced Client Lookup Bot for Traders...")
     
     # Load client data
     load_clients_from_csv("clients.csv")
@@ -626,48 +1070,25 @@ async def run():
     config = BdkConfigLoader.load_from_file(Path(__file__).parent.parent / "resources" / "config.yaml")
 
     async with SymphonyBdk(config) as bdk:
+        # Create the pooled HTTP session on the bot's event loop
+        await get_session()
+        
         activities = bdk.activities()
         
         # Register activities
-        print("Registering ClientSearchActivity...")
+        log.debug("Registering ClientSearchActivity...")
         activities.register(ClientSearchActivity(bdk.messages()))
         
-        print("Registering ClientSelectionFormActivity...")
+        log.debug("Registering ClientSelectionFormActivity...")
         activities.register(ClientSelectionFormActivity(bdk.messages()))
 
-        print("Registering TradeDocumentActivity...")
+        log.debug("Registering TradeDocumentActivity...")
         activities.register(TradeDocumentActivity(bdk.messages()))
 
         # Add helpful slash commands
         @activities.slash("/help", description="Show help for client lookup")
         async def help_command(context: CommandContext):
-            help_text = f"""<messageML>
-                <h2>📞 Enhanced Client Lookup Bot - Help</h2>
-                
-                <h3>Quick Commands:</h3>
-                <ul>
-                    <li><b>find juan 123</b> - Search for clients matching "juan" and "123"</li>
-                    <li><b>find maria</b> - Search for clients named Maria</li>
-                    <li><b>find 456</b> - Search for clients with ID containing 456</li>
-                    <li><b>fav</b> - Show favourite clients instantly</li>
-                </ul>
-                
-                <h3>Features:</h3>
-                <ul>
-                    <li>⭐ Favourite clients pinned at top of chat</li>
-                    <li>🔍 Searches both name and ID</li>
-                    <li>⚡ Ultra-fast selection with buttons</li>
-                    <li>🚦 Client status with traffic lights</li>
-                    <li>💳 Credit line utilization monitoring</li>
-                    <li>📊 Last 5 trades history</li>
-                    <li>📋 Use /favourites to refresh the pinned favourites</li>
-                </ul>
-                
-                <p><b>Loaded:</b> {len(CLIENTS)} clients, {len(FAVOURITES)} favourites</p>
-                <p><b>API Status:</b> Connected to {TRADES_API_BASE_URL}</p>
-            </messageML>"""
-            
-            await bdk.messages().send_message(context.stream_id, help_text)
+            await bdk.messages().send_message(context.stream_id, _HELP_TEXT)
 
         @activities.slash("/favourites", description="Show/refresh favourite clients")
         async def favourites_command(context: CommandContext):
@@ -678,76 +1099,59 @@ async def run():
         @activities.slash("/reload", description="Reload client data from CSV and refresh favourites")
         async def reload_command(context: CommandContext):
             """Reload CSV data and automatically show updated favourites."""
-            print(f"Reload command triggered by {context.initiator.user.display_name}")
+            log.info("Reload command triggered by %s", context.initiator.user.display_name)
             
             success = load_clients_from_csv("clients.csv")
+            clear_api_cache()
             
-            if success:
-                message = f"""<messageML>
-                    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
-                        <b>✅ Reloaded {len(CLIENTS)} clients, {len(FAVOURITES)} favourites from CSV</b>
-                    </div>
-                </messageML>"""
-            else:
-                message = f"""<messageML>
-                    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
-                        <b>⚠️ Using sample data: {len(CLIENTS)} clients, {len(FAVOURITES)} favourites</b>
-                    </div>
-                </messageML>"""
+            template = _RELOAD_OK_TEMPLATE if success else _RELOAD_FALLBACK_TEMPLATE
+            message = template.format(
+                clients=len(CLIENT_IDS),
+                favourites=len(FAVOURITES),
+                favourites_bar=create_favourites_bar()
+            )
             
             await bdk.messages().send_message(context.stream_id, message)
-            
-            # Auto-refresh favourites after reload with small delay
-            await asyncio.sleep(0.5)
-            favourites_message = create_favourites_bar()
-            await bdk.messages().send_message(context.stream_id, favourites_message)
 
         @activities.slash("/api", description="Check API connectivity and status")
         async def api_command(context: CommandContext):
             """Check API connectivity and show status."""
-            print(f"API check command triggered by {context.initiator.user.display_name}")
+            log.info("API check command triggered by %s", context.initiator.user.display_name)
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    url = f"{TRADES_API_BASE_URL}/health"
-                    async with session.get(url, timeout=5) as response:
-                        if response.status == 200:
-                            health_data = await response.json()
-                            api_message = f"""<messageML>
-                                <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
-                                    <b>✅ API Status: Healthy</b><br/>
-                                    📊 Trades: {health_data.get('total_trades', 'Unknown')}<br/>
-                                    🚦 Statuses: {health_data.get('total_client_statuses', 'Unknown')}<br/>
-                                    💳 Credit Lines: {health_data.get('total_credit_lines', 'Unknown')}<br/>
-                                    🔗 URL: {TRADES_API_BASE_URL}
-                                </div>
-                            </messageML>"""
-                        else:
-                            api_message = f"""<messageML>
-                                <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
-                                    <b>⚠️ API Status: Error {response.status}</b><br/>
-                                    🔗 URL: {TRADES_API_BASE_URL}
-                                </div>
-                            </messageML>"""
+                health_data = await get_api_health()
+                api_message = _API_HEALTHY_TEMPLATE.format(
+                    trades=health_data.get('total_trades', 'Unknown'),
+                    statuses=health_data.get('total_client_statuses', 'Unknown'),
+                    credit_lines=health_data.get('total_credit_lines', 'Unknown'),
+                    api_url=TRADES_API_BASE_URL
+                )
+            except aiohttp.ClientResponseError as e:
+                api_message = _API_ERROR_TEMPLATE.format(status=e.status, api_url=TRADES_API_BASE_URL)
             except Exception as e:
-                api_message = f"""<messageML>
-                    <div style="font-size: 10px; padding: 6px; border-radius: 2px;">
-                        <b>❌ API Status: Unavailable</b><br/>
-                        Error: {str(e)}<br/>
-                        🔗 URL: {TRADES_API_BASE_URL}
-                    </div>
-                </messageML>"""
+                api_message = _API_UNAVAILABLE_TEMPLATE.format(error=e, api_url=TRADES_API_BASE_URL)
             
             await bdk.messages().send_message(context.stream_id, api_message)
 
         # Start the datafeed loop
         datafeed_loop = bdk.datafeed()
-        print("Starting datafeed...")
-        print(f"Bot ready! Loaded {len(CLIENTS)} clients with {len(FAVOURITES)} favourites.")
-        print("Usage: Type 'find client name' or 'find 12345' to search")
-        print(f"API: {TRADES_API_BASE_URL}")
-        await datafeed_loop.start()
+        log.info("Starting datafeed...")
+        log.info("Bot ready! Loaded %d clients with %d favourites.", len(CLIENT_IDS), len(FAVOURITES))
+        log.info("Usage: Type 'find client name' or 'find 12345' to search")
+        log.info("API: %s", TRADES_API_BASE_URL)
+        try:
+            await datafeed_loop.start()
+        finally:
+            await close_session()
 
 
 if __name__ == "__main__":
+    # uvloop is optional and has no Windows build; otherwise fall back to the stdlib loop
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(run())
\ No newline at end of file
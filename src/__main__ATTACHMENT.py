@@ -5,11 +5,15 @@ Based on our exploration findings - uses direct event listener pattern
 """
 
 import asyncio
+import sys
+import codecs
+import html
+from collections import OrderedDict
 import logging.config
 from pathlib import Path
 import os
-import base64
-import tempfile
+import binascii
+import uuid
 
 from symphony.bdk.core.activity.command import CommandContext
 from symphony.bdk.core.config.loader import BdkConfigLoader
@@ -18,17 +22,123 @@ from symphony.bdk.core.symphony_bdk import SymphonyBdk
 from symphony.bdk.gen.agent_model.v4_initiator import V4Initiator
 from symphony.bdk.gen.agent_model.v4_message_sent import V4MessageSent
 
-# PDF processing (you may need to install: pip install PyPDF2)
+log = logging.getLogger(__name__)
+
+# PDF processing (you may need to install: pip install pypdf)
 try:
-    import PyPDF2
+    import pypdf
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
-    print("⚠️  PyPDF2 not available. Install with: pip install PyPDF2")
+    log.warning("pypdf not available. Install with: pip install pypdf")
 
 # Text file processing
 import io
 
+# File extensions that get a content preview
+_PDF_EXT = '.pdf'
+_TEXT_EXTS = frozenset({'.txt', '.md', '.csv', '.log', '.json', '.xml', '.html', '.py', '.js', '.css'})
+
+# Only this much of a text file is decoded for its preview
+TEXT_PREVIEW_HEAD_BYTES = 64 * 1024
+
+# Numbered names tried for a colliding download before falling back to a random suffix
+SAVE_NUMBERED_ATTEMPTS = 10
+
+# Create-only open flags; O_BINARY only exists (and matters) on Windows
+_EXCLUSIVE_CREATE_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+
+# How many recent message IDs to remember for duplicate detection
+PROCESSED_MESSAGES_MAXSIZE = 10_000
+
+
+class _PreviewComplete(Exception):
+    """Raised from the PDF text visitor once enough preview lines are collected."""
+
+
+def _extract_pdf_head(file_data, limit=5):
+    """Return up to `limit` non-empty lines from the first PDF page, or None if it has no pages.
+    
+    Text is collected through a visitor that aborts extraction as soon as the
+    lines are found, so the rest of the page's content stream is never interpreted.
+    """
+    pdf_reader = pypdf.PdfReader(io.BytesIO(file_data), strict=False)
+    if len(pdf_reader.pages) == 0:
+        return None
+    
+    lines = []
+    current = []
+    
+    def visit_text(text, *_):
+        first, *rest = text.split('\n')
+        current.append(first)
+        for part in rest:
+            line = "".join(current).strip()
+            if line:
+                lines.append(line)
+                if len(lines) >= limit:
+                    raise _PreviewComplete
+            current[:] = [part]
+    
+    try:
+        pdf_reader.pages[0].extract_text(visitor_text=visit_text)
+    except _PreviewComplete:
+        return lines
+    
+    # The page ended before `limit` lines; keep its unterminated last line
+    line = "".join(current).strip()
+    if line:
+        lines.append(line)
+    return lines
+
+
+# Byte order marks, longest first (the UTF-32 LE mark starts with the UTF-16 LE one)
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _sniff_encoding(head):
+    """Pick one encoding for a text preview: from a BOM, else UTF-8 if the first 4 KiB are valid, else cp1252."""
+    for bom, encoding in _BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head[:4096], final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def _save_file(directory, file_name, file_data):
+    """Write file_data to directory/file_name, adding a _1, _2... suffix if the name is taken.
+    
+    Names are claimed with an exclusive create, so two writers can never pick the
+    same one. After SAVE_NUMBERED_ATTEMPTS collisions a random suffix is used instead.
+    Blocking; returns the Path actually written.
+    """
+    file_path = Path(directory) / file_name
+    stem, suffix = file_path.stem, file_path.suffix
+    counter = 0
+    while True:
+        try:
+            fd = os.open(file_path, _EXCLUSIVE_CREATE_FLAGS, 0o644)
+            break
+        except FileExistsError:
+            counter += 1
+            if counter <= SAVE_NUMBERED_ATTEMPTS:
+                file_path = file_path.with_name(f"{stem}_{counter}{suffix}")
+            else:
+                file_path = file_path.with_name(f"{stem}_{uuid.uuid4().hex[:6]}{suffix}")
+    
+    with os.fdopen(fd, 'wb') as f:
+        f.write(file_data)
+    return file_path
+
 
 class AttachmentDownloadListener(RealTimeEventListener):
     """Direct event listener that processes attachment messages."""
@@ -36,7 +146,9 @@ class AttachmentDownloadListener(RealTimeEventListener):
     def __init__(self, bdk):
         self.bdk = bdk
         self.download_path = r"C:\Users\bencl\OneDrive - palace.cl\Desktop"
-        self.processed_messages = set()  # Avoid duplicate processing
+        # Recently processed message IDs, oldest first (bounded to avoid duplicates without leaking memory)
+        self.processed_messages = OrderedDict()
+        self.processed_count = 0
         
     async def on_message_sent(self, initiator: V4Initiator, event: V4MessageSent):
         """Process every message and download attachments if found."""
@@ -50,210 +162,163 @@ class AttachmentDownloadListener(RealTimeEventListener):
             # Skip if already processed (avoid duplicates)
             message_id = message.message_id
             if message_id in self.processed_messages:
+                self.processed_messages.move_to_end(message_id)
                 return
             
-            self.processed_messages.add(message_id)
+            self.processed_messages[message_id] = None
+            if len(self.processed_messages) > PROCESSED_MESSAGES_MAXSIZE:
+                self.processed_messages.popitem(last=False)
+            self.processed_count += 1
             
             # Get basic info
             user_name = initiator.user.display_name
             stream_id = message.stream.stream_id
             
-            print(f"\n📎 PROCESSING ATTACHMENT MESSAGE")
-            print(f"   From: {user_name}")
-            print(f"   Message ID: {message_id}")
-            print(f"   Stream ID: {stream_id}")
-            print(f"   Attachments: {len(message.attachments)}")
+            log.info("Processing %d attachment(s) from %s (message %s, stream %s)",
+                     len(message.attachments), user_name, message_id, stream_id)
             
-            # Process each attachment
-            attachment_results = []
-            for i, attachment in enumerate(message.attachments):
-                print(f"\n   Processing attachment {i}...")
-                
-                # Access attachment properties correctly
-                attachment_id = attachment.id
-                file_name = attachment.name
-                file_size = attachment.size
-                
-                print(f"      ID: {attachment_id}")
-                print(f"      Name: {file_name}")
-                print(f"      Size: {file_size} bytes")
-                
-                # Download the attachment
-                download_result = await self._download_attachment(
-                    stream_id, message_id, attachment_id, file_name
-                )
-                
-                # Try to read file content for preview
-                content_preview = await self._get_file_preview(file_name, attachment_id, stream_id, message_id)
-                
+            # Process all attachments concurrently; results keep the attachment order
+            results = await asyncio.gather(
+                *(self._process_attachment(stream_id, message_id, i, attachment)
+                  for i, attachment in enumerate(message.attachments)),
+                return_exceptions=True
+            )
+            
+            # Build the response in one pass so large previews are copied only once
+            parts = [f"<messageML><p>Hi {html.escape(user_name)}! I processed your attachments:</p><p>"]
+            for i, (attachment, result) in enumerate(zip(message.attachments, results)):
+                if i:
+                    parts.append("<br/>")
+                if isinstance(result, BaseException):
+                    parts.append(f"📎 {html.escape(attachment.name)} - ❌ Failed: {html.escape(str(result) or type(result).__name__)}")
+                    continue
+                summary, content_preview = result
+                parts.append(summary)
                 if content_preview:
-                    attachment_results.append(f"📎 {file_name} ({file_size:,} bytes) - {download_result}<br/><b>Preview:</b><br/>{content_preview}")
-                else:
-                    attachment_results.append(f"📎 {file_name} ({file_size:,} bytes) - {download_result}")
-                
+                    parts.extend(("<br/><b>Preview:</b><br/>", content_preview))
+            parts.append("</p></messageML>")
+            
             # Send response message
-            if attachment_results:
-                results_text = "<br/>".join(attachment_results)
-                response = f"""<messageML>
-                    <p>Hi {user_name}! I processed your attachments:</p>
-                    <p>{results_text}</p>
-                </messageML>"""
-                
-                await self.bdk.messages().send_message(stream_id, response)
+            await self.bdk.messages().send_message(stream_id, "".join(parts))
             
         except Exception as e:
-            print(f"❌ Error processing attachment message: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error processing attachment message")
             
             # Try to send error message
             try:
                 await self.bdk.messages().send_message(
                     stream_id,
-                    f"<messageML>Sorry, I encountered an error processing your attachment: {str(e)}</messageML>"
+                    f"<messageML>Sorry, I encountered an error processing your attachment: {html.escape(str(e))}</messageML>"
                 )
             except:
                 pass
     
+    async def _process_attachment(self, stream_id, message_id, index, attachment):
+        """Download and preview one attachment, returning (summary line, preview or None) for the reply."""
+        # Access attachment properties correctly
+        attachment_id = attachment.id
+        file_name = attachment.name
+        file_size = attachment.size
+        
+        log.debug("Attachment %d: id=%s name=%s size=%s bytes", index, attachment_id, file_name, file_size)
+        
+        # Download the attachment (fetched and decoded once, reused for the preview)
+        download_result, file_data = await self._download_attachment(
+            stream_id, message_id, attachment_id, file_name
+        )
+        
+        # Try to read file content for preview
+        content_preview = await self._get_file_preview(file_name, file_data)
+        
+        return f"📎 {html.escape(file_name)} ({file_size:,} bytes) - {download_result}", content_preview
+    
     async def _download_attachment(self, stream_id, message_id, attachment_id, file_name):
-        """Download an attachment and save it to the specified path."""
+        """Download an attachment and save it to the specified path.
+        
+        Returns (result text, decoded file bytes or None if the download failed).
+        """
+        file_data = None
         try:
-            print(f"      Downloading: {file_name}")
-            print(f"      Stream ID: {stream_id}")
-            print(f"      Message ID: {message_id}")
-            print(f"      Attachment ID: {attachment_id}")
+            log.debug("Downloading %s (stream %s, message %s, attachment %s)",
+                      file_name, stream_id, message_id, attachment_id)
             
             # Get the attachment content using MessageService
             attachment_content = await self.bdk.messages().get_attachment(stream_id, message_id, attachment_id)
             
-            print(f"      Retrieved content length: {len(attachment_content)}")
-            
-            # The content is returned as base64 encoded string, so we need to decode it
-            file_data = base64.b64decode(attachment_content)
-            
-            print(f"      Decoded file size: {len(file_data)} bytes")
+            log.debug("Retrieved content length: %d", len(attachment_content))
             
-            # Create the full file path
-            file_path = os.path.join(self.download_path, file_name)
+            # The content is returned as base64 encoded string, so we need to decode it.
+            # a2b_base64 reads the ASCII str in place (b64decode would first copy it to
+            # bytes), and the encoded text is dropped as soon as it is decoded.
+            file_data = binascii.a2b_base64(attachment_content)
+            del attachment_content
             
-            # Handle file name conflicts by adding a number suffix
-            counter = 1
-            original_file_path = file_path
-            while os.path.exists(file_path):
-                name, ext = os.path.splitext(original_file_path)
-                file_path = f"{name}_{counter}{ext}"
-                counter += 1
+            log.debug("Decoded file size: %d bytes", len(file_data))
             
-            # Write the file
-            with open(file_path, 'wb') as f:
-                f.write(file_data)
+            # Write the file in a worker thread so a slow disk doesn't stall the event loop
+            file_path = await asyncio.to_thread(_save_file, self.download_path, file_name, file_data)
             
-            print(f"      ✅ Saved to: {file_path}")
-            return f"✅ Downloaded: {os.path.basename(file_path)}"
+            log.info("Saved %s to %s", file_name, file_path)
+            return f"✅ Downloaded: {html.escape(file_path.name)}", file_data
             
         except Exception as e:
-            print(f"      ❌ Download failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return f"❌ Failed to download: {file_name} - {str(e)}"
+            log.exception("Download of %s failed", file_name)
+            return f"❌ Failed to download: {html.escape(file_name)} - {html.escape(str(e))}", file_data
     
-    async def _get_file_preview(self, file_name, attachment_id, stream_id, message_id):
+    async def _get_file_preview(self, file_name, file_data):
         """Get first 5 lines of file content for preview."""
+        if file_data is None:
+            return None
+        
         try:
             file_ext = os.path.splitext(file_name)[1].lower()
             
-            if file_ext == '.pdf':
-                return await self._get_pdf_preview(attachment_id, stream_id, message_id)
-            elif file_ext in ['.txt', '.md', '.csv', '.log', '.json', '.xml', '.html', '.py', '.js', '.css']:
-                return await self._get_text_preview(attachment_id, stream_id, message_id)
+            if file_ext == _PDF_EXT:
+                return await self._get_pdf_preview(file_data)
+            elif file_ext in _TEXT_EXTS:
+                return await self._get_text_preview(file_data)
             else:
-                return f"<i>Preview not available for {file_ext} files</i>"
+                return f"<i>Preview not available for {html.escape(file_ext)} files</i>"
                 
         except Exception as e:
-            print(f"      ⚠️  Preview failed: {e}")
-            return f"<i>Preview error: {str(e)}</i>"
+            log.warning("Preview of %s failed: %s", file_name, e)
+            return f"<i>Preview error: {html.escape(str(e))}</i>"
     
-    async def _get_pdf_preview(self, attachment_id, stream_id, message_id):
+    async def _get_pdf_preview(self, file_data):
         """Extract first 5 lines from PDF."""
         if not PDF_AVAILABLE:
-            return "<i>PDF preview requires PyPDF2 (pip install PyPDF2)</i>"
+            return "<i>PDF preview requires pypdf (pip install pypdf)</i>"
         
         try:
-            # Get the attachment content
-            attachment_content = await self.bdk.messages().get_attachment(stream_id, message_id, attachment_id)
-            file_data = base64.b64decode(attachment_content)
+            # Extraction is CPU-bound pure Python, so keep it off the event loop
+            first_lines = await asyncio.to_thread(_extract_pdf_head, file_data)
             
-            # Create a temporary file to work with PyPDF2
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                temp_file.write(file_data)
-                temp_file_path = temp_file.name
+            if first_lines is None:
+                return "<i>PDF has no readable pages</i>"
             
-            try:
-                # Read PDF content
-                with open(temp_file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    
-                    if len(pdf_reader.pages) == 0:
-                        return "<i>PDF has no readable pages</i>"
-                    
-                    # Extract text from first page
-                    first_page = pdf_reader.pages[0]
-                    text = first_page.extract_text()
-                    
-                    if not text or text.strip() == "":
-                        return "<i>PDF contains no extractable text</i>"
-                    
-                    # Get first 5 lines
-                    lines = text.split('\n')
-                    first_5_lines = []
-                    line_count = 0
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if line:  # Skip empty lines
-                            first_5_lines.append(line)
-                            line_count += 1
-                            if line_count >= 5:
-                                break
-                    
-                    if first_5_lines:
-                        preview_text = "<br/>".join(first_5_lines)
-                        return f"<code>{preview_text}</code>"
-                    else:
-                        return "<i>PDF contains no readable text lines</i>"
-                        
-            finally:
-                # Clean up temp file
-                try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
-                    
+            if first_lines:
+                preview_text = "<br/>".join(map(html.escape, first_lines))
+                return f"<code>{preview_text}</code>"
+            else:
+                return "<i>PDF contains no extractable text</i>"
+                
         except Exception as e:
-            print(f"      ❌ PDF preview error: {e}")
-            return f"<i>PDF preview error: {str(e)}</i>"
+            log.warning("PDF preview error: %s", e)
+            return f"<i>PDF preview error: {html.escape(str(e))}</i>"
     
-    async def _get_text_preview(self, attachment_id, stream_id, message_id):
+    async def _get_text_preview(self, file_data):
         """Extract first 5 lines from text file."""
         try:
-            # Get the attachment content
-            attachment_content = await self.bdk.messages().get_attachment(stream_id, message_id, attachment_id)
-            file_data = base64.b64decode(attachment_content)
+            # Five lines fit in the head of the file, so only that part is decoded
+            head = file_data[:TEXT_PREVIEW_HEAD_BYTES]
             
-            # Try to decode as text (try multiple encodings)
-            text_content = None
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'ascii']:
-                try:
-                    text_content = file_data.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if text_content is None:
-                return "<i>Could not decode text file</i>"
+            # Decode as text. The incremental decoder holds back a multi-byte
+            # character cut off at the end of the head.
+            encoding = _sniff_encoding(head)
+            text_content = codecs.getincrementaldecoder(encoding)(errors='replace').decode(head, final=False)
             
-            # Get first 5 lines
-            lines = text_content.split('\n')
+            # Get first 5 lines, splitting lazily
+            lines = io.StringIO(text_content)
             first_5_lines = []
             line_count = 0
             
@@ -269,14 +334,14 @@ class AttachmentDownloadListener(RealTimeEventListener):
                         break
             
             if first_5_lines:
-                preview_text = "<br/>".join(first_5_lines)
+                preview_text = "<br/>".join(map(html.escape, first_5_lines))
                 return f"<code>{preview_text}</code>"
             else:
                 return "<i>File contains no readable text lines</i>"
                 
         except Exception as e:
-            print(f"      ❌ Text preview error: {e}")
-            return f"<i>Text preview error: {str(e)}</i>"
+            log.warning("Text preview error: %s", e)
+            return f"<i>Text preview error: {html.escape(str(e))}</i>"
 
 
 async def run():
@@ -312,15 +377,15 @@ async def run():
                     <li><b>/stats</b> - Show download statistics</li>
                 </ul>
                 <p>Downloads are saved to: <code>C:\\Users\\bencl\\OneDrive - palace.cl\\Desktop</code></p>
-                <p><i>Note: PDF preview requires PyPDF2 (pip install PyPDF2)</i></p>
+                <p><i>Note: PDF preview requires pypdf (pip install pypdf)</i></p>
             </messageML>"""
             await bdk.messages().send_message(context.stream_id, response)
 
         @activities.slash("/test")
         async def test_command(context: CommandContext):
             """Test command to verify bot is working."""
-            user_name = context.initiator.user.display_name
-            pdf_status = "✅ Available" if PDF_AVAILABLE else "❌ Not installed (pip install PyPDF2)"
+            user_name = html.escape(context.initiator.user.display_name)
+            pdf_status = "✅ Available" if PDF_AVAILABLE else "❌ Not installed (pip install pypdf)"
             
             response = f"""<messageML>
                 <p>Hello {user_name}! Bot is working.</p>
@@ -354,7 +419,7 @@ async def run():
         @activities.slash("/stats")
         async def stats_command(context: CommandContext):
             """Show download statistics."""
-            processed_count = len(attachment_listener.processed_messages)
+            processed_count = attachment_listener.processed_count
             
             response = f"""<messageML>
                 <p><b>Download Statistics:</b></p>
@@ -364,15 +429,21 @@ async def run():
             
             await bdk.messages().send_message(context.stream_id, response)
 
-        print("🚀 Attachment Download Bot Started!")
-        print(f"📁 Download path: {attachment_listener.download_path}")
-        print("📎 Send file attachments to test automatic download")
+        log.info("Attachment Download Bot started, saving downloads to %s", attachment_listener.download_path)
         
         # Start the datafeed loop
         await datafeed_loop.start()
 
 
 if __name__ == "__main__":
+    # uvloop is optional and has no Windows build; otherwise fall back to the stdlib loop
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         logging.info("Starting Attachment Download Bot...")
         asyncio.run(run())
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
 import asyncio
+import sys
+import html
+import re
 import logging.config
 from pathlib import Path
 import aiohttp
+import orjson
 
 from symphony.bdk.core.config.loader import BdkConfigLoader
 from symphony.bdk.core.symphony_bdk import SymphonyBdk
@@ -13,19 +17,67 @@ from symphony.bdk.core.activity.command import CommandActivity, CommandContext
 logging_conf = Path(__file__).parent.parent / "resources" / "logging.conf"
 logging.config.fileConfig(logging_conf, disable_existing_loggers=False)
 
+# Structured per-request timeouts for the weather and local Claude APIs
+WEATHER_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=2)
+CLAUDE_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=2)
+
+# Largest JSON body accepted from either API
+MAX_RESPONSE_BYTES = 64 * 1024
+
+def create_http_session():
+    """Create the HTTP session shared by the weather and Claude API activities."""
+    # wttr.in is the only host that needs DNS; look it up with aiodns when it's installed
+    # (AsyncResolver raises RuntimeError without it, leaving aiohttp's threaded resolver)
+    try:
+        resolver = aiohttp.AsyncResolver()
+    except RuntimeError:
+        resolver = None
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=32,
+            resolver=resolver,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+    )
+
+def _escape(value):
+    """HTML-escape any API value for interpolation into MessageML."""
+    return html.escape(str(value))
+
+async def read_json(response, limit=MAX_RESPONSE_BYTES):
+    """Read at most `limit` bytes of a response body and parse it with orjson.
+    
+    Raises ValueError if the body is larger, without buffering the rest of it.
+    """
+    raw = bytearray()
+    while len(raw) <= limit:
+        chunk = await response.content.read(limit + 1 - len(raw))
+        if not chunk:
+            return orjson.loads(raw)
+        raw += chunk
+    raise ValueError(f"response too large (over {limit} bytes)")
+
 # Custom Weather Command Activity (like the expenses bot pattern)
 class WeatherCommandActivity(CommandActivity):
     """Handles weather requests like @Bot /weather London"""
     
-    def __init__(self, messages):
+    def __init__(self, messages, session):
         self._messages = messages
+        self._session = session
+        # Compiled "@Bot /command" pattern, rebuilt if the bot name changes
+        self._bot_name = None
+        self._pattern = None
         super().__init__()
     
     def matches(self, context: CommandContext) -> bool:
-        text = context.text_content.lower()
-        bot_name = context.bot_display_name.lower()
-        # Match "@Bot /weather" pattern (case insensitive)
-        return f"@{bot_name} /weather" in text
+        text = context.text_content
+        bot_name = context.bot_display_name
+        if bot_name != self._bot_name:
+            self._bot_name = bot_name
+            self._pattern = re.compile(rf"@{re.escape(bot_name)}\s+/weather\b", re.IGNORECASE)
+        # Match "@Bot /weather" pattern (case insensitive); one regex scan of the raw text, no lower() copies
+        return self._pattern.search(text) is not None
     
     async def on_activity(self, context: CommandContext):
         print(f"WeatherCommandActivity triggered by {context.initiator.user.display_name}")
@@ -33,70 +85,75 @@ class WeatherCommandActivity(CommandActivity):
         
         text = context.text_content
         
-        # Extract city from the message
-        if "/weather" in text:
-            parts = text.split("/weather", 1)
-            if len(parts) > 1:
-                city = parts[1].strip()
-                if city:
-                    print(f"City extracted: '{city}'")
-                    
-                    # Make weather API call
-                    try:
-                        headers = {'User-Agent': 'Symphony-Weather-Bot/1.0'}
+        # Extract city from the message: everything after the "@Bot /weather" that matches() found
+        match = self._pattern.search(text) if self._pattern else None
+        city = text[match.end():].strip() if match else ""
+        if city:
+            print(f"City extracted: '{city}'")
+            safe_city = html.escape(city)
+            
+            # Make weather API call
+            try:
+                headers = {'User-Agent': 'Symphony-Weather-Bot/1.0'}
+                
+                url = f"https://wttr.in/{city}?format=j1"
+                print(f"Calling URL: {url}")
+                
+                async with self._session.get(url, timeout=WEATHER_TIMEOUT, headers=headers) as response:
+                    if response.status == 200:
+                        data = await read_json(response)
+                        current = data['current_condition'][0]
                         
-                        async with aiohttp.ClientSession() as session:
-                            url = f"https://wttr.in/{city}?format=j1"
-                            print(f"Calling URL: {url}")
-                            
-                            async with session.get(url, timeout=10, headers=headers) as response:
-                                if response.status == 200:
-                                    data = await response.json()
-                                    current = data['current_condition'][0]
-                                    
-                                    weather_info = f"""<messageML>
-                                        <h3>🌤️ Weather for {data['nearest_area'][0]['areaName'][0]['value']}</h3>
-                                        <p><b>Condition:</b> {current['weatherDesc'][0]['value']}</p>
-                                        <p><b>Temperature:</b> {current['temp_C']}°C (Feels like: {current['FeelsLikeC']}°C)</p>
-                                        <p><b>Humidity:</b> {current['humidity']}%</p>
-                                        <p><b>Wind:</b> {current['windspeedKmph']} km/h from {current['winddir16Point']}</p>
-                                        <p><b>Visibility:</b> {current['visibility']} km</p>
-                                    </messageML>"""
-                                    
-                                    await self._messages.send_message(context.stream_id, weather_info)
-                                else:
-                                    await self._messages.send_message(
-                                        context.stream_id,
-                                        f"<messageML>Sorry, I couldn't find weather for '<b>{city}</b>'. Please check the name and try again.</messageML>"
-                                    )
-                                    
-                    except Exception as e:
-                        print(f"Weather API error: {e}")
+                        weather_info = f"""<messageML>
+                            <h3>🌤️ Weather for {_escape(data['nearest_area'][0]['areaName'][0]['value'])}</h3>
+                            <p><b>Condition:</b> {_escape(current['weatherDesc'][0]['value'])}</p>
+                            <p><b>Temperature:</b> {_escape(current['temp_C'])}°C (Feels like: {_escape(current['FeelsLikeC'])}°C)</p>
+                            <p><b>Humidity:</b> {_escape(current['humidity'])}%</p>
+                            <p><b>Wind:</b> {_escape(current['windspeedKmph'])} km/h from {_escape(current['winddir16Point'])}</p>
+                            <p><b>Visibility:</b> {_escape(current['visibility'])} km</p>
+                        </messageML>"""
+                        
+                        await self._messages.send_message(context.stream_id, weather_info)
+                    else:
                         await self._messages.send_message(
                             context.stream_id,
-                            f"<messageML>❌ Error getting weather for {city}: {str(e)}</messageML>"
+                            f"<messageML>Sorry, I couldn't find weather for '<b>{safe_city}</b>'. Please check the name and try again.</messageML>"
                         )
-                    return
-        
+                            
+            except Exception as e:
+                print(f"Weather API error: {e}")
+                await self._messages.send_message(
+                    context.stream_id,
+                    f"<messageML>❌ Error getting weather for {safe_city}: {_escape(e)}</messageML>"
+                )
+            return
+
         # No city provided
         await self._messages.send_message(
             context.stream_id,
-            f"<messageML>Please provide a city name. Usage: <b>@{context.bot_display_name} /weather London</b></messageML>"
+            f"<messageML>Please provide a city name. Usage: <b>@{_escape(context.bot_display_name)} /weather London</b></messageML>"
         )
 
 # Custom Claude API Command Activity
 class ClaudeAPIActivity(CommandActivity):
     """Handles Claude API requests like @Bot /ask What is the capital of France?"""
     
-    def __init__(self, messages):
+    def __init__(self, messages, session):
         self._messages = messages
+        self._session = session
+        # Compiled "@Bot /command" pattern, rebuilt if the bot name changes
+        self._bot_name = None
+        self._pattern = None
         super().__init__()
     
     def matches(self, context: CommandContext) -> bool:
-        text = context.text_content.lower()
-        bot_name = context.bot_display_name.lower()
-        # Match "@Bot /ask" pattern (case insensitive)
-        return f"@{bot_name} /ask" in text
+        text = context.text_content
+        bot_name = context.bot_display_name
+        if bot_name != self._bot_name:
+            self._bot_name = bot_name
+            self._pattern = re.compile(rf"@{re.escape(bot_name)}\s+/ask\b", re.IGNORECASE)
+        # Match "@Bot /ask" pattern (case insensitive); one regex scan of the raw text, no lower() copies
+        return self._pattern.search(text) is not None
     
     async def on_activity(self, context: CommandContext):
         print(f"ClaudeAPIActivity triggered by {context.initiator.user.display_name}")
@@ -104,74 +161,71 @@ class ClaudeAPIActivity(CommandActivity):
         
         text = context.text_content
         
-        # Extract question from the message
-        if "/ask" in text:
-            parts = text.split("/ask", 1)
-            if len(parts) > 1:
-                question = parts[1].strip()
-                if question:
-                    print(f"Question extracted: '{question}'")
-                    
-                    # Call your local Claude API
-                    try:
-                        headers = {
-                            'Content-Type': 'application/json',
-                            'User-Agent': 'Symphony-Bot/1.0'
-                        }
+        # Extract question from the message: everything after the "@Bot /ask" that matches() found
+        match = self._pattern.search(text) if self._pattern else None
+        question = text[match.end():].strip() if match else ""
+        if question:
+            print(f"Question extracted: '{question}'")
+            
+            # Call your local Claude API
+            try:
+                headers = {
+                    'Content-Type': 'application/json',
+                    'User-Agent': 'Symphony-Bot/1.0'
+                }
+                
+                payload = {
+                    "question": question
+                }
+                
+                url = "http://127.0.0.1:8000/ask"
+                print(f"Calling local Claude API: {url}")
+                print(f"Payload: {payload}")
+                
+                async with self._session.post(url, json=payload, headers=headers, timeout=CLAUDE_TIMEOUT) as response:
+                    if response.status == 200:
+                        data = await read_json(response)
+                        print(f"Claude API response: {data}")
                         
-                        payload = {
-                            "question": question
-                        }
+                        # Extract the answer from the response
+                        # Adjust this based on your API's response format
+                        answer = data.get('answer', data.get('response', str(data)))
                         
-                        async with aiohttp.ClientSession() as session:
-                            url = "http://127.0.0.1:8000/ask"
-                            print(f"Calling local Claude API: {url}")
-                            print(f"Payload: {payload}")
-                            
-                            async with session.post(url, json=payload, headers=headers, timeout=30) as response:
-                                if response.status == 200:
-                                    data = await response.json()
-                                    print(f"Claude API response: {data}")
-                                    
-                                    # Extract the answer from the response
-                                    # Adjust this based on your API's response format
-                                    answer = data.get('answer', data.get('response', str(data)))
-                                    
-                                    claude_response = f"""<messageML>
-                                        <h3>🤖 Claude's Response</h3>
-                                        <p><b>Question:</b> {question}</p>
-                                        <p><b>Answer:</b></p>
-                                        <p>{answer}</p>
-                                    </messageML>"""
-                                    
-                                    await self._messages.send_message(context.stream_id, claude_response)
-                                else:
-                                    print(f"Claude API returned status: {response.status}")
-                                    error_text = await response.text()
-                                    print(f"Error response: {error_text}")
-                                    await self._messages.send_message(
-                                        context.stream_id,
-                                        f"<messageML>❌ Claude API error: Status {response.status}</messageML>"
-                                    )
-                                    
-                    except aiohttp.ClientConnectorError:
-                        print("Connection error - is your local API running on port 8000?")
-                        await self._messages.send_message(
-                            context.stream_id,
-                            "<messageML>❌ Cannot connect to local Claude API. Is it running on http://127.0.0.1:8000?</messageML>"
-                        )
-                    except Exception as e:
-                        print(f"Claude API error: {e}")
+                        claude_response = f"""<messageML>
+                            <h3>🤖 Claude's Response</h3>
+                            <p><b>Question:</b> {html.escape(question)}</p>
+                            <p><b>Answer:</b></p>
+                            <p>{_escape(answer)}</p>
+                        </messageML>"""
+                        
+                        await self._messages.send_message(context.stream_id, claude_response)
+                    else:
+                        print(f"Claude API returned status: {response.status}")
+                        error_text = await response.text()
+                        print(f"Error response: {error_text}")
                         await self._messages.send_message(
                             context.stream_id,
-                            f"<messageML>❌ Error calling Claude API: {str(e)}</messageML>"
+                            f"<messageML>❌ Claude API error: Status {response.status}</messageML>"
                         )
-                    return
-        
+                            
+            except aiohttp.ClientConnectorError:
+                print("Connection error - is your local API running on port 8000?")
+                await self._messages.send_message(
+                    context.stream_id,
+                    "<messageML>❌ Cannot connect to local Claude API. Is it running on http://127.0.0.1:8000?</messageML>"
+                )
+            except Exception as e:
+                print(f"Claude API error: {e}")
+                await self._messages.send_message(
+                    context.stream_id,
+                    f"<messageML>❌ Error calling Claude API: {_escape(e)}</messageML>"
+                )
+            return
+
         # No question provided
         await self._messages.send_message(
             context.stream_id,
-            f"<messageML>Please provide a question. Usage: <b>@{context.bot_display_name} /ask What is the capital of France?</b></messageML>"
+            f"<messageML>Please provide a question. Usage: <b>@{_escape(context.bot_display_name)} /ask What is the capital of France?</b></messageML>"
         )
 
 async def run():
@@ -181,26 +235,28 @@ async def run():
     # Load configuration using the working pattern from expenses bot
     config = BdkConfigLoader.load_from_file(Path(__file__).parent.parent / "resources" / "config.yaml")
 
-    async with SymphonyBdk(config) as bdk:
+    # One pooled HTTP session for /weather and /ask, closed when the bot stops
+    async with SymphonyBdk(config) as bdk, create_http_session() as session:
         activities = bdk.activities()
         
         # Register custom activities
         print("Registering WeatherCommandActivity...")
-        activities.register(WeatherCommandActivity(bdk.messages()))
+        activities.register(WeatherCommandActivity(bdk.messages(), session))
         
         print("Registering ClaudeAPIActivity...")
-        activities.register(ClaudeAPIActivity(bdk.messages()))
+        activities.register(ClaudeAPIActivity(bdk.messages(), session))
 
         # Keep simple slash commands that work (without arguments)
         @activities.slash("/hello", description="Say hello to the bot")
         async def hello(context: CommandContext):
             print(f"Hello command received from {context.initiator.user.display_name}")
-            user_name = context.initiator.user.display_name
+            user_name = html.escape(context.initiator.user.display_name)
+            bot_name = html.escape(context.bot_display_name)
             response = f"""<messageML>Hello, <b>{user_name}</b>! I'm the Weather Bot with Claude integration. 
             
 Try these commands:
-• <b>@{context.bot_display_name} /weather London</b> - Get weather
-• <b>@{context.bot_display_name} /ask What is the capital of France?</b> - Ask Claude anything
+• <b>@{bot_name} /weather London</b> - Get weather
+• <b>@{bot_name} /ask What is the capital of France?</b> - Ask Claude anything
 👋</messageML>"""
             await bdk.messages().send_message(context.stream_id, response)
 
@@ -219,4 +275,12 @@ Try these commands:
 
 
 if __name__ == "__main__":
+    # uvloop is optional and has no Windows build; otherwise fall back to the stdlib loop
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(run())
\ No newline at end of file
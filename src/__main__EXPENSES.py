@@ -9,15 +9,136 @@ from symphony.bdk.core.activity.user_joined_room import UserJoinedRoomActivity,
 from symphony.bdk.core.service.message.message_service import MessageService
 from symphony.bdk.core.service.user.user_service import UserService
 import re
+import sys
+from functools import lru_cache
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 
-# Global storage for demo
-EXPENSES = []
+@dataclass
+class Expense:
+    """One tracked expense; slots keep each record compact."""
+    # Declared by hand rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('user', 'amount', 'description', 'category', 'date', 'timestamp')
+    
+    user: str
+    amount: float
+    description: str
+    category: str
+    date: str
+    timestamp: datetime
+
+# Global storage for demo, partitioned by user so a summary only touches that user's expenses
+EXPENSES_BY_USER = {}
+EXPENSE_COUNT = 0
+
+# Running totals kept in step with the stored expenses so /expenses never sums them
+EXPENSES_TOTAL = 0.0
+USER_TOTALS = defaultdict(float)
+
+# Money amounts ($25, $25.50, 25.50, etc.), compiled once for every message
+MONEY_RE = re.compile(r'\$?(\d+(?:\.\d{2})?)')
+MONEY_STRIP_RE = re.compile(r'\$?\d+(?:\.\d{2})?')
+
+# Words that mark a message as an expense, matched as whole words in one case-insensitive scan
+EXPENSE_KEYWORDS_RE = re.compile(r'\b(spent|paid|bought|expense|cost)\b', re.IGNORECASE)
+
+# Verbs the description follows, in the order they are tried
+EXPENSE_VERBS = ('spent', 'paid', 'bought', 'cost')
+EXPENSE_VERB_RE = re.compile(r'\b(spent|paid|bought|cost)\b', re.IGNORECASE)
 
 # Configure logging
 logging_conf = Path(__file__).parent.parent / "resources" / "logging.conf"
 logging.config.fileConfig(logging_conf, disable_existing_loggers=False)
 
+@lru_cache(maxsize=4)
+def parse_expense(text, start=0):
+    """Parse the amount and description out of an expense message, or return None without an amount.
+    
+    The description follows the first verb in EXPENSE_VERBS order that leaves a non-empty one.
+    `start` may skip a prefix known to contain no expense keyword; the verbs are all found
+    in a single scan from there.
+    
+    >>> parse_expense("I spent $25 on lunch")
+    {'amount': '25', 'description': 'lunch'}
+    >>> parse_expense("Expense: paid $30 for taxi")
+    {'amount': '30', 'description': 'taxi'}
+    >>> parse_expense("Lunch cost me $12, paid by card")
+    {'amount': '12', 'description': 'by card'}
+    >>> parse_expense("$30 paid")
+    {'amount': '30', 'description': 'misc expense'}
+    """
+    # Look for money amounts ($25, $25.50, 25.50, etc.)
+    money_match = MONEY_RE.search(text)
+    if not money_match:
+        return None
+    
+    # First occurrence of each verb, from one pass over the text
+    verb_ends = {}
+    for verb_match in EXPENSE_VERB_RE.finditer(text, start):
+        verb_ends.setdefault(verb_match.group(1).lower(), verb_match.end())
+    
+    description = "misc expense"
+    for verb in EXPENSE_VERBS:
+        if verb in verb_ends:
+            # Clean up the description
+            desc = text[verb_ends[verb]:].lower().strip()
+            desc = MONEY_STRIP_RE.sub('', desc).strip()
+            desc = desc.replace('on ', '').replace('for ', '').strip()
+            if desc:
+                description = desc
+                break
+    
+    return {
+        'amount': money_match.group(1),
+        'description': description
+    }
+
+def date_string(day):
+    """Format a date once per day, so every expense from that day shares one string."""
+    return day.strftime('%Y-%m-%d')
+
+def add_expense(expense):
+    """Store an expense and update the running totals."""
+    global EXPENSE_COUNT, EXPENSES_TOTAL
+    user = expense.user
+    EXPENSES_BY_USER.setdefault(user, []).append(expense)
+    EXPENSE_COUNT += 1
+    EXPENSES_TOTAL += expense.amount
+    USER_TOTALS[user] += expense.amount
+
+def clear_expenses():
+    """Drop all stored expenses and reset the running totals; returns how many were dropped."""
+    global EXPENSE_COUNT, EXPENSES_TOTAL
+    count = EXPENSE_COUNT
+    EXPENSES_BY_USER.clear()
+    EXPENSE_COUNT = 0
+    EXPENSES_TOTAL = 0.0
+    USER_TOTALS.clear()
+    return count
+
+# Static message parts, built once instead of on every message
+_EXPENSE_TIP_TEMPLATE = """<messageML>
+<h2>💡 Expense Tip</h2>
+<p>Hi {user_name}! I can track expenses when you mention amounts and what you bought.</p>
+<p><b>Try saying:</b></p>
+<ul>
+<li>"I spent $25 on lunch"</li>
+<li>"Paid $150 for software"</li>
+<li>"Bought coffee for $4.50"</li>
+</ul>
+<p>Use @{bot_name} /expenses to see your total!</p>
+</messageML>"""
+
+_EXPENSE_SUMMARY_FOOTER = """
+<h3>💡 Tips:</h3>
+<ul>
+<li>Say "I spent $25 on lunch" to track expenses</li>
+<li>Say "Paid $150 for software license"</li>
+<li>Say "Bought coffee for $4.50"</li>
+</ul>
+</messageML>"""
+
 # Existing activities
 class EchoCommandActivity(CommandActivity):
     """Example of a complex command that just echoes what is after @bot-name /echo"""
@@ -56,90 +177,59 @@ class ExpenseTrackerActivity(CommandActivity):
     
     def __init__(self, messages):
         self._messages = messages
+        # (context, keyword match) from the last matches() call, reused by on_activity
+        self._last_match = (None, None)
         super().__init__()
     
     def matches(self, context: CommandContext) -> bool:
-        text = context.text_content.lower()
-        expense_keywords = ['spent', 'paid', 'bought', 'expense', 'cost']
-        return any(keyword in text for keyword in expense_keywords)
+        keyword_match = EXPENSE_KEYWORDS_RE.search(context.text_content)
+        self._last_match = (context, keyword_match)
+        return keyword_match is not None
     
     async def on_activity(self, context: CommandContext):
         text = context.text_content
         user_name = context.initiator.user.display_name
         
-        expense_data = self._parse_expense(text)
+        # Nothing before the keyword matches() found can be a verb, so parsing starts there.
+        # The stored context is released right away rather than kept until the next message.
+        last_context, keyword_match = self._last_match
+        self._last_match = (None, None)
+        if last_context is not context:
+            keyword_match = EXPENSE_KEYWORDS_RE.search(text)
+        
+        expense_data = parse_expense(text, keyword_match.start() if keyword_match else 0)
         
         if expense_data:
             # Save the expense automatically with default category
-            expense = {
-                'user': user_name,
-                'amount': float(expense_data['amount']),
-                'description': expense_data['description'],
-                'category': 'other',
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'timestamp': datetime.now()
-            }
-            EXPENSES.append(expense)
+            now = datetime.now()
+            # Interned name, cached date and literal category are shared across records
+            expense = Expense(
+                user=sys.intern(user_name),
+                amount=float(expense_data['amount']),
+                description=expense_data['description'],
+                category='other',
+                date=date_string(now.date()),
+                timestamp=now
+            )
+            add_expense(expense)
             
             confirmation = f"""<messageML>
 <h2>✅ Expense Tracked!</h2>
 <p><b>{user_name}</b> spent <b>${expense_data['amount']}</b> on <b>{expense_data['description']}</b></p>
 <p>📦 Category: Other</p>
-<p>📅 Date: {expense['date']}</p>
-<p>Total expenses tracked: <b>{len(EXPENSES)}</b></p>
+<p>📅 Date: {expense.date}</p>
+<p>Total expenses tracked: <b>{EXPENSE_COUNT}</b></p>
 <p><i>Use @{context.bot_display_name} /expenses to see your summary</i></p>
 </messageML>"""
             
             await self._messages.send_message(context.stream_id, confirmation)
         else:
             # Couldn't parse the expense
-            await self._messages.send_message(context.stream_id, f"""<messageML>
-<h2>💡 Expense Tip</h2>
-<p>Hi {user_name}! I can track expenses when you mention amounts and what you bought.</p>
-<p><b>Try saying:</b></p>
-<ul>
-<li>"I spent $25 on lunch"</li>
-<li>"Paid $150 for software"</li>
-<li>"Bought coffee for $4.50"</li>
-</ul>
-<p>Use @{context.bot_display_name} /expenses to see your total!</p>
-</messageML>""")
+            await self._messages.send_message(
+                context.stream_id,
+                _EXPENSE_TIP_TEMPLATE.format(user_name=user_name, bot_name=context.bot_display_name)
+            )
     
-    def _parse_expense(self, text):
-        # Look for money amounts ($25, $25.50, 25.50, etc.)
-        money_pattern = r'\$?(\d+(?:\.\d{2})?)'
-        money_match = re.search(money_pattern, text)
-        
-        if money_match:
-            amount = money_match.group(1)
-            
-            # Try to extract description (everything after common expense verbs)
-            expense_verbs = ['spent', 'paid', 'bought', 'cost']
-            description = text
-            
-            for verb in expense_verbs:
-                if verb in text.lower():
-                    parts = text.lower().split(verb, 1)
-                    if len(parts) > 1:
-                        # Clean up the description
-                        desc = parts[1].strip()
-                        desc = re.sub(r'\$?\d+(?:\.\d{2})?', '', desc).strip()
-                        desc = desc.replace('on ', '').replace('for ', '').strip()
-                        if desc:
-                            description = desc
-                            break
-            
-            # Clean up description
-            if description == text:
-                description = "misc expense"
-            
-            return {
-                'amount': amount,
-                'description': description
-            }
-        
-        return None
-
 async def run():
     config = BdkConfigLoader.load_from_file(Path(__file__).parent.parent / "resources" / "config.yaml")
 
@@ -156,45 +246,37 @@ async def run():
         # Add expense summary slash command
         @activities.slash("/expenses")
         async def show_expenses(context: CommandContext):
-            if not EXPENSES:
+            if not EXPENSE_COUNT:
                 await bdk.messages().send_message(
                     context.stream_id,
                     "<messageML>📊 No expenses tracked yet! Try saying 'I spent $20 on lunch' to get started.</messageML>"
                 )
                 return
             
-            total = sum(exp['amount'] for exp in EXPENSES)
-            user_expenses = [exp for exp in EXPENSES if exp['user'] == context.initiator.user.display_name]
-            user_total = sum(exp['amount'] for exp in user_expenses)
+            user_name = context.initiator.user.display_name
+            # .get() so asking for a summary doesn't create empty entries for the user
+            user_total = USER_TOTALS.get(user_name, 0.0)
+            user_expenses = EXPENSES_BY_USER.get(user_name, ())
             
             summary = f"""<messageML>
 <h2>📊 Expense Summary</h2>
 <p><b>Your Total: ${user_total:.2f}</b></p>
 <p>Your Entries: {len(user_expenses)}</p>
-<p><i>Everyone's Total: ${total:.2f} ({len(EXPENSES)} entries)</i></p>
+<p><i>Everyone's Total: ${EXPENSES_TOTAL:.2f} ({EXPENSE_COUNT} entries)</i></p>
 
 <h3>Your Recent Expenses:</h3>"""
             
             for exp in user_expenses[-5:]:  # Last 5 user expenses
-                summary += f"<p>• ${exp['amount']:.2f} - {exp['description']} ({exp['date']})</p>"
+                summary += f"<p>• ${exp.amount:.2f} - {exp.description} ({exp.date})</p>"
             
-            summary += """
-<h3>💡 Tips:</h3>
-<ul>
-<li>Say "I spent $25 on lunch" to track expenses</li>
-<li>Say "Paid $150 for software license"</li>
-<li>Say "Bought coffee for $4.50"</li>
-</ul>
-</messageML>"""
+            summary += _EXPENSE_SUMMARY_FOOTER
             
             await bdk.messages().send_message(context.stream_id, summary)
 
         # Add a clear expenses command for testing
         @activities.slash("/clear")
-        async def clear_expenses(context: CommandContext):
-            global EXPENSES
-            old_count = len(EXPENSES)
-            EXPENSES = []
+        async def clear_expenses_command(context: CommandContext):
+            old_count = clear_expenses()
             await bdk.messages().send_message(
                 context.stream_id,
                 f"<messageML>🗑️ Cleared {old_count} expenses. Ready for fresh tracking!</messageML>"
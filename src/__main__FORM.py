@@ -94,6 +94,33 @@ class TradingFormHandler(FormReplyActivity):
         )
 
 
+# The /trade form never changes, so it is built once
+_TRADING_FORM_HTML = """<messageML>
+    <h2>💰 Currency Trading Form</h2>
+
+    <form id="trading_form">
+        <h3>Currency Pair:</h3>
+        <select name="currency_pair" required="true">
+            <option value="EUR/USD">EUR/USD</option>
+            <option value="GBP/USD">GBP/USD</option>
+            <option value="USD/JPY">USD/JPY</option>
+            <option value="AUD/USD">AUD/USD</option>
+            <option value="USD/CAD">USD/CAD</option>
+        </select>
+        
+        <h3>Amount:</h3>
+        <text-field name="amount" placeholder="Enter amount (e.g. 100000)" required="true"></text-field>
+        
+        <h3>Price:</h3>
+        <text-field name="price" placeholder="Enter price (e.g. 1.2345)" required="true"></text-field>
+        
+        <h3>Action:</h3>
+        <button name="buy">🟢 BUY</button>
+        <button name="sell">🔴 SELL</button>
+    </form>
+</messageML>"""
+
+
 async def run():
     config = BdkConfigLoader.load_from_file(Path(__file__).parent.parent / "resources" / "config.yaml")
 
@@ -110,32 +137,7 @@ async def run():
         # Command to show the trading form
         @activities.slash("/trade")
         async def show_trading_form(context):
-            trading_form = """<messageML>
-                <h2>💰 Currency Trading Form</h2>
-
-                <form id="trading_form">
-                    <h3>Currency Pair:</h3>
-                    <select name="currency_pair" required="true">
-                        <option value="EUR/USD">EUR/USD</option>
-                        <option value="GBP/USD">GBP/USD</option>
-                        <option value="USD/JPY">USD/JPY</option>
-                        <option value="AUD/USD">AUD/USD</option>
-                        <option value="USD/CAD">USD/CAD</option>
-                    </select>
-                    
-                    <h3>Amount:</h3>
-                    <text-field name="amount" placeholder="Enter amount (e.g. 100000)" required="true"></text-field>
-                    
-                    <h3>Price:</h3>
-                    <text-field name="price" placeholder="Enter price (e.g. 1.2345)" required="true"></text-field>
-                    
-                    <h3>Action:</h3>
-                    <button name="buy">🟢 BUY</button>
-                    <button name="sell">🔴 SELL</button>
-                </form>
-                </messageML>"""
-            
-            await bdk.messages().send_message(context.stream_id, trading_form)
+            await bdk.messages().send_message(context.stream_id, _TRADING_FORM_HTML)
 
 
         datafeed_loop = bdk.datafeed()